@@ -1,19 +1,16 @@
 """Pytest configuration and shared fixtures."""
 
 import os
-import tempfile
+import shutil
+import sys
 from pathlib import Path
+from typing import TYPE_CHECKING
 from unittest.mock import MagicMock, patch
 
 import pytest
 
-from whisper_dictate.config import (
-    Config,
-    GeneralConfig,
-    ModelConfig,
-    TranscriptionConfig,
-    UIConfig,
-)
+if TYPE_CHECKING:
+    from whisper_dictate.config import Config
 
 
 @pytest.fixture
@@ -32,19 +29,44 @@ def tmp_data_dir(tmp_path: Path) -> Path:
     return data_dir
 
 
-@pytest.fixture
-def tmp_models_dir(tmp_path: Path) -> Path:
-    """Create a temporary models directory with a fake model."""
-    models_dir = tmp_path / "models"
-    models_dir.mkdir()
+@pytest.fixture(scope="session")
+def fake_model_blob(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """Write fake model data once; other fixtures hard-link to it."""
+    blob = tmp_path_factory.mktemp("blob") / "fake-model.bin"
+    blob.write_bytes(b"fake model data")
+    return blob
+
+
+@pytest.fixture(scope="session")
+def tmp_models_dir(
+    tmp_path_factory: pytest.TempPathFactory, fake_model_blob: Path
+) -> Path:
+    """Create a shared, read-only models directory with a fake model."""
+    models_dir = tmp_path_factory.mktemp("models")
     # Create a fake model file
-    (models_dir / "ggml-small.en.bin").write_bytes(b"fake model data")
+    os.link(fake_model_blob, models_dir / "ggml-small.en.bin")
     return models_dir
 
 
 @pytest.fixture
-def sample_config(tmp_models_dir: Path) -> Config:
+def writable_models_dir(tmp_models_dir: Path, tmp_path: Path) -> Path:
+    """Create a per-test copy of the models directory that tests may modify."""
+    return Path(
+        shutil.copytree(tmp_models_dir, tmp_path / "models", copy_function=os.link)
+    )
+
+
+@pytest.fixture(scope="session")
+def sample_config(tmp_models_dir: Path) -> "Config":
     """Create a sample configuration for testing."""
+    from whisper_dictate.config import (
+        Config,
+        GeneralConfig,
+        ModelConfig,
+        TranscriptionConfig,
+        UIConfig,
+    )
+
     return Config(
         general=GeneralConfig(output_mode="clipboard", language="en"),
         model=ModelConfig(name="small.en", path=str(tmp_models_dir)),
@@ -55,50 +77,56 @@ def sample_config(tmp_models_dir: Path) -> Config:
     )
 
 
-@pytest.fixture
-def mock_whisper_cli(tmp_path: Path) -> Path:
-    """Create a mock whisper-cli executable."""
-    cli_path = tmp_path / "whisper-cli"
-    cli_path.write_text("#!/bin/bash\necho 'test transcription'")
-    cli_path.chmod(0o755)
-    return cli_path
+@pytest.fixture(scope="session")
+def mock_pyaudio():
+    """Mock PyAudio for testing without audio hardware (installed once)."""
+    mock = MagicMock()
+    mock_pa = MagicMock()
+    mock_pa.get_sample_size.return_value = 2  # 16-bit = 2 bytes
+    mock.PyAudio.return_value = mock_pa
+    mock.paInt16 = 8
+    mock.paContinue = 0
+    # AudioRecorder imports pyaudio lazily, so patch the module registry
+    patcher = patch.dict(sys.modules, {"pyaudio": mock})
+    patcher.start()
+    yield mock
+    patcher.stop()
 
 
 @pytest.fixture
-def mock_pyaudio():
-    """Mock PyAudio for testing without audio hardware."""
-    with patch("whisper_dictate.recorder.pyaudio") as mock:
-        mock_pa = MagicMock()
-        mock_pa.get_sample_size.return_value = 2  # 16-bit = 2 bytes
-        mock.PyAudio.return_value = mock_pa
-        mock.paInt16 = 8
-        mock.paContinue = 0
+def mock_urlopen():
+    """
+    Mock urllib.request.urlopen with a pre-wired context-manager response.
+
+    The download probe reports no size or checksum, so downloads take the
+    single-request path.
+    """
+    with (
+        patch("urllib.request.urlopen") as mock,
+        patch(
+            "whisper_dictate.transcriber._probe_download",
+            side_effect=lambda url: (url, None, None, False),
+        ),
+    ):
+        response = mock.return_value.__enter__.return_value
+        response.read.return_value = b"model data"
         yield mock
 
 
 @pytest.fixture
-def env_override(tmp_path: Path):
+def env_override(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
     """Override XDG environment variables for testing."""
-    old_config = os.environ.get("XDG_CONFIG_HOME")
-    old_data = os.environ.get("XDG_DATA_HOME")
+    from whisper_dictate.config import _clear_path_cache
 
     config_dir = tmp_path / "config"
     data_dir = tmp_path / "data"
     config_dir.mkdir()
     data_dir.mkdir()
 
-    os.environ["XDG_CONFIG_HOME"] = str(config_dir)
-    os.environ["XDG_DATA_HOME"] = str(data_dir)
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(config_dir))
+    monkeypatch.setenv("XDG_DATA_HOME", str(data_dir))
+    _clear_path_cache()
 
     yield {"config": config_dir, "data": data_dir}
 
-    # Restore original values
-    if old_config:
-        os.environ["XDG_CONFIG_HOME"] = old_config
-    else:
-        os.environ.pop("XDG_CONFIG_HOME", None)
-
-    if old_data:
-        os.environ["XDG_DATA_HOME"] = old_data
-    else:
-        os.environ.pop("XDG_DATA_HOME", None)
+    _clear_path_cache()
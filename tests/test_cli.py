@@ -1,96 +1,67 @@
 """Tests for the CLI module."""
 
+import os
 import sys
-from io import StringIO
 from pathlib import Path
-from unittest.mock import MagicMock, patch
+from unittest.mock import patch
 
 import pytest
 
 from whisper_dictate.cli import create_parser, main
 
 
+@pytest.fixture(scope="module")
+def parser():
+    """Build the argument parser once for all parser tests."""
+    return create_parser()
+
+
 class TestArgumentParser:
     """Test CLI argument parsing."""
 
-    def test_create_parser(self):
+    def test_create_parser(self, parser):
         """Test parser creation."""
-        parser = create_parser()
         assert parser.prog == "whisper-dictate"
 
-    def test_parser_help(self):
+    def test_parser_help(self, parser):
         """Test --help output."""
-        parser = create_parser()
         with pytest.raises(SystemExit) as exc_info:
             parser.parse_args(["--help"])
         assert exc_info.value.code == 0
 
-    def test_parser_version(self):
+    def test_parser_version(self, parser):
         """Test --version output."""
-        parser = create_parser()
         with pytest.raises(SystemExit) as exc_info:
             parser.parse_args(["--version"])
         assert exc_info.value.code == 0
 
-    def test_parser_type_flag(self):
-        """Test --type flag."""
-        parser = create_parser()
-        args = parser.parse_args(["--type"])
-        assert args.type is True
-
-    def test_parser_model_option(self):
-        """Test --model option."""
-        parser = create_parser()
-        args = parser.parse_args(["--model", "base.en"])
-        assert args.model == "base.en"
-
-    def test_parser_position_option(self):
-        """Test --position option."""
-        parser = create_parser()
-        args = parser.parse_args(["--position", "top"])
-        assert args.position == "top"
-
-    def test_parser_position_validates_choices(self):
+    def test_parser_position_validates_choices(self, parser):
         """Test --position validates choices."""
-        parser = create_parser()
         with pytest.raises(SystemExit):
             parser.parse_args(["--position", "invalid"])
 
-    def test_parser_language_option(self):
-        """Test --language option."""
-        parser = create_parser()
-        args = parser.parse_args(["--language", "de"])
-        assert args.language == "de"
-
-    def test_parser_config_option(self):
-        """Test --config option."""
-        parser = create_parser()
-        args = parser.parse_args(["--config", "/path/to/config.toml"])
-        assert args.config == Path("/path/to/config.toml")
-
-    def test_parser_download_model_option(self):
-        """Test --download-model option."""
-        parser = create_parser()
-        args = parser.parse_args(["--download-model", "small.en"])
-        assert args.download_model == "small.en"
-
-    def test_parser_list_models_flag(self):
-        """Test --list-models flag."""
-        parser = create_parser()
-        args = parser.parse_args(["--list-models"])
-        assert args.list_models is True
-
-    def test_parser_init_config_flag(self):
-        """Test --init-config flag."""
-        parser = create_parser()
-        args = parser.parse_args(["--init-config"])
-        assert args.init_config is True
-
-    def test_parser_show_config_flag(self):
-        """Test --show-config flag."""
-        parser = create_parser()
-        args = parser.parse_args(["--show-config"])
-        assert args.show_config is True
+    @pytest.mark.parametrize(
+        "argv,attr,expected",
+        [
+            (["--type"], "type", True),
+            (["--model", "base.en"], "model", "base.en"),
+            (["--position", "top"], "position", "top"),
+            (["--language", "de"], "language", "de"),
+            (
+                ["--config", "/path/to/config.toml"],
+                "config",
+                Path("/path/to/config.toml"),
+            ),
+            (["--daemon"], "daemon", True),
+            (["--download-model", "small.en"], "download_model", "small.en"),
+            (["--list-models"], "list_models", True),
+            (["--init-config"], "init_config", True),
+            (["--show-config"], "show_config", True),
+        ],
+    )
+    def test_parser_flags(self, parser, argv, attr, expected):
+        """Test each option is parsed into the expected attribute."""
+        assert getattr(parser.parse_args(argv), attr) == expected
 
 
 class TestMainListModels:
@@ -104,11 +75,11 @@ class TestMainListModels:
         captured = capsys.readouterr()
         assert "No models found" in captured.out
 
-    def test_list_models_with_models(self, env_override, capsys):
+    def test_list_models_with_models(self, env_override, fake_model_blob, capsys):
         """Test listing models when some exist."""
         models_dir = env_override["data"] / "whisper-dictate" / "models"
         models_dir.mkdir(parents=True)
-        (models_dir / "ggml-small.en.bin").write_bytes(b"fake")
+        os.link(fake_model_blob, models_dir / "ggml-small.en.bin")
 
         with patch.object(sys, "argv", ["whisper-dictate", "--list-models"]):
             main()
@@ -158,3 +129,20 @@ class TestMainShowConfig:
         assert "Language:" in captured.out
         assert "Model:" in captured.out
         assert "Position:" in captured.out
+
+
+class TestMainInstance:
+    """Test main function when claiming the running instance."""
+
+    def test_unreachable_instance_exits_with_error(self, env_override, capsys):
+        """Test a failed claim prints an error and exits non-zero."""
+        with patch.object(sys, "argv", ["whisper-dictate"]):
+            with patch(
+                "whisper_dictate.cli.claim_instance",
+                side_effect=RuntimeError("Could not claim"),
+            ):
+                with pytest.raises(SystemExit) as exc_info:
+                    main()
+
+        assert exc_info.value.code == 1
+        assert "Could not claim" in capsys.readouterr().err
@@ -1,16 +1,22 @@
 """Tests for the config module."""
 
-import os
 from pathlib import Path
 
 import pytest
 
+try:
+    import tomllib
+except ImportError:
+    import tomli as tomllib  # type: ignore
+
 from whisper_dictate.config import (
     Config,
     GeneralConfig,
     ModelConfig,
     TranscriptionConfig,
     UIConfig,
+    _clear_path_cache,
+    config_from_dict,
     create_default_config,
     get_config_dir,
     get_config_path,
@@ -21,65 +27,63 @@ from whisper_dictate.config import (
 )
 
 
+@pytest.fixture(autouse=True)
+def clear_path_cache():
+    """Recompute config paths from the environment in every test."""
+    _clear_path_cache()
+    yield
+    _clear_path_cache()
+
+
 class TestDataclassDefaults:
     """Test dataclass default values."""
 
-    def test_general_config_defaults(self):
-        """Test GeneralConfig has correct defaults."""
-        config = GeneralConfig()
-        assert config.output_mode == "clipboard"
-        assert config.language == "en"
+    def test_all_dataclass_defaults(self):
+        """Test every config dataclass has the correct defaults."""
+        general = GeneralConfig()
+        assert general.output_mode == "clipboard"
+        assert general.language == "en"
 
-    def test_model_config_defaults(self):
-        """Test ModelConfig has correct defaults."""
-        config = ModelConfig()
-        assert config.name == "small.en"
+        model = ModelConfig()
+        assert model.name == "small.en"
         # path should be auto-set to models dir
-        assert config.path != ""
-
-    def test_transcription_config_defaults(self):
-        """Test TranscriptionConfig has correct defaults."""
-        config = TranscriptionConfig()
-        assert config.whisper_cli == ""
-        assert config.threads == 4
-        assert config.timeout == 60
-
-    def test_ui_config_defaults(self):
-        """Test UIConfig has correct defaults."""
-        config = UIConfig()
-        assert config.position == "bottom"
-        assert config.edge_margin == 60
-        assert config.theme == "google"
-
-    def test_config_defaults(self):
-        """Test Config container has correct nested defaults."""
+        assert model.path != ""
+
+        transcription = TranscriptionConfig()
+        assert transcription.whisper_cli == ""
+        assert transcription.threads == 4
+        assert transcription.timeout == 60
+
+        ui = UIConfig()
+        assert ui.position == "bottom"
+        assert ui.edge_margin == 60
+        assert ui.theme == "google"
+
         config = Config()
         assert isinstance(config.general, GeneralConfig)
         assert isinstance(config.model, ModelConfig)
         assert isinstance(config.transcription, TranscriptionConfig)
         assert isinstance(config.ui, UIConfig)
 
+    @pytest.mark.parametrize(
+        "name,file_name",
+        [("small.en", "ggml-small.en.bin"), ("custom.bin", "custom.bin")],
+    )
+    def test_model_file_path(self, name, file_name):
+        """Test the model file path is built from the model name."""
+        model = ModelConfig(name=name, path="/models")
+        assert model.file_path == Path("/models") / file_name
+
 
 class TestPathFunctions:
     """Test XDG-compliant path functions."""
 
-    def test_get_config_dir_with_xdg(self, env_override):
-        """Test config dir uses XDG_CONFIG_HOME when set."""
-        config_dir = get_config_dir()
-        assert config_dir == env_override["config"] / "whisper-dictate"
-
-    def test_get_data_dir_with_xdg(self, env_override):
-        """Test data dir uses XDG_DATA_HOME when set."""
-        data_dir = get_data_dir()
-        assert data_dir == env_override["data"] / "whisper-dictate"
+    def test_xdg_paths(self, env_override):
+        """Test config, data, models and config file paths follow XDG vars."""
+        assert get_config_dir() == env_override["config"] / "whisper-dictate"
+        assert get_data_dir() == env_override["data"] / "whisper-dictate"
+        assert get_models_dir() == env_override["data"] / "whisper-dictate" / "models"
 
-    def test_get_models_dir(self, env_override):
-        """Test models dir is under data dir."""
-        models_dir = get_models_dir()
-        assert models_dir == env_override["data"] / "whisper-dictate" / "models"
-
-    def test_get_config_path(self, env_override):
-        """Test config path is config.toml in config dir."""
         config_path = get_config_path()
         assert config_path.name == "config.toml"
         assert config_path.parent == env_override["config"] / "whisper-dictate"
@@ -94,10 +98,9 @@ class TestLoadConfig:
         assert config.general.output_mode == "clipboard"
         assert config.general.language == "en"
 
-    def test_load_config_valid_toml(self, tmp_path: Path):
+    def test_load_config_valid_toml(self):
         """Test loading valid TOML config."""
-        config_file = tmp_path / "config.toml"
-        config_file.write_text(
+        data = tomllib.loads(
             """
 [general]
 output_mode = "type"
@@ -111,49 +114,68 @@ position = "top"
 theme = "blue"
 """
         )
-        config = load_config(config_file)
+        config = config_from_dict(data)
         assert config.general.output_mode == "type"
         assert config.general.language == "de"
         assert config.model.name == "base.en"
         assert config.ui.position == "top"
         assert config.ui.theme == "blue"
 
-    def test_load_config_partial_toml(self, tmp_path: Path):
+    def test_load_config_partial_toml(self):
         """Test loading partial TOML uses defaults for missing values."""
-        config_file = tmp_path / "config.toml"
-        config_file.write_text(
+        data = tomllib.loads(
             """
 [general]
 output_mode = "type"
 """
         )
-        config = load_config(config_file)
+        config = config_from_dict(data)
         assert config.general.output_mode == "type"
         assert config.general.language == "en"  # default
         assert config.model.name == "small.en"  # default
 
+    def test_load_config_ignores_unknown_keys(self):
+        """Test unknown keys and sections are ignored."""
+        data = tomllib.loads(
+            """
+[transcription]
+threads = 8
+beam_size = 5
+
+[experimental]
+enabled = true
+"""
+        )
+        config = config_from_dict(data)
+        assert config.transcription.threads == 8
+        assert config.transcription.timeout == 60  # default
+        assert not hasattr(config.transcription, "beam_size")
+
 
 class TestSaveConfig:
     """Test configuration saving."""
 
-    def test_save_config_creates_file(self, tmp_path: Path, sample_config: Config):
+    def test_save_config_creates_file(self, tmp_path: Path, fs, sample_config: Config):
         """Test saving config creates a valid TOML file."""
+        fs.create_dir(tmp_path)
         config_file = tmp_path / "config.toml"
         result = save_config(sample_config, config_file)
         assert result is True
         assert config_file.exists()
 
     def test_save_config_creates_parent_dirs(
-        self, tmp_path: Path, sample_config: Config
+        self, tmp_path: Path, fs, sample_config: Config
     ):
         """Test saving config creates parent directories."""
+        fs.create_dir(tmp_path)
         config_file = tmp_path / "nested" / "dir" / "config.toml"
         result = save_config(sample_config, config_file)
         assert result is True
         assert config_file.exists()
 
-    def test_save_and_load_roundtrip(self, tmp_path: Path, sample_config: Config):
+    def test_save_and_load_roundtrip(self, tmp_path: Path, fs, sample_config: Config):
         """Test saving and loading preserves values."""
+        fs.create_dir(tmp_path)
         config_file = tmp_path / "config.toml"
         save_config(sample_config, config_file)
         loaded = load_config(config_file)
@@ -168,13 +190,13 @@ class TestSaveConfig:
 class TestCreateDefaultConfig:
     """Test default config creation."""
 
-    def test_create_default_config(self, env_override):
+    def test_create_default_config(self, env_override, fs):
         """Test creating default config file."""
         create_default_config()
         config_path = get_config_path()
         assert config_path.exists()
 
-    def test_create_default_config_does_not_overwrite(self, env_override):
+    def test_create_default_config_does_not_overwrite(self, env_override, fs):
         """Test creating default config doesn't overwrite existing."""
         config_path = get_config_path()
         config_path.parent.mkdir(parents=True, exist_ok=True)
@@ -1,52 +1,93 @@
 """Tests for the recorder module."""
 
+import os
+import wave
 from pathlib import Path
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock
 
 import pytest
 
+from whisper_dictate.recorder import AudioRecorder
+
+# 1024 bytes (512 int16 samples) of quiet and louder fake audio
+_FAKE_AUDIO_FRAME = b"\x00\x01" * 512
+_FAKE_AUDIO_FRAME_LOUD = b"\x00\x10" * 512
+
+# Keep recordings out of the real XDG data directory
+pytestmark = pytest.mark.usefixtures("env_override")
+
 
 class TestAudioRecorder:
     """Test AudioRecorder class."""
 
-    def test_init(self, mock_pyaudio):
+    def test_init(self, mock_pyaudio, env_override):
         """Test AudioRecorder initialization."""
-        from whisper_dictate.recorder import AudioRecorder
-
         recorder = AudioRecorder()
         assert recorder.recording is False
-        assert recorder.audio_frames == []
-        assert recorder.temp_file_path is None
+        assert recorder.temp_file_path == str(
+            env_override["data"] / "whisper-dictate" / "tmp" / f"rec-{os.getpid()}.wav"
+        )
+
+    def test_init_sweeps_stale_recordings(self, mock_pyaudio, env_override):
+        """Test recordings left by dead processes are removed."""
+        recordings_dir = env_override["data"] / "whisper-dictate" / "tmp"
+        recordings_dir.mkdir(parents=True)
+        stale = recordings_dir / "rec-999999999.wav"
+        stale.write_bytes(b"stale")
+        live = recordings_dir / f"rec-{os.getppid()}.wav"
+        live.write_bytes(b"live")
+
+        AudioRecorder()
+        assert not stale.exists()
+        assert live.exists()
+
+    def test_start_reuses_recording_file(self, mock_pyaudio):
+        """Test every recording goes to the same file."""
+        recorder = AudioRecorder()
+        recorder.start()
+        first = recorder.temp_file_path
+        recorder.stop()
+        recorder.start()
+        assert recorder.temp_file_path == first
+        recorder.stop()
+
+    def test_recording_file_is_private(self, mock_pyaudio):
+        """Test recordings are only readable by the user who made them."""
+        old_umask = os.umask(0o022)
+        try:
+            recorder = AudioRecorder()
+            recorder.start()
+        finally:
+            os.umask(old_umask)
+        path = Path(recorder.temp_file_path)
+        assert path.stat().st_mode & 0o777 == 0o600
+        assert path.parent.stat().st_mode & 0o777 == 0o700
+        recorder.stop()
+        recorder.cleanup_temp_file()
 
     def test_init_with_callback(self, mock_pyaudio):
         """Test AudioRecorder initialization with level callback."""
-        from whisper_dictate.recorder import AudioRecorder
-
         callback = MagicMock()
         recorder = AudioRecorder(level_callback=callback)
         assert recorder.level_callback is callback
 
     def test_start_recording(self, mock_pyaudio):
         """Test starting recording."""
-        from whisper_dictate.recorder import AudioRecorder
-
         recorder = AudioRecorder()
         recorder.start()
 
         assert recorder.recording is True
         assert recorder.temp_file_path is not None
-        assert recorder.audio_frames == []
+        recorder.stop()
 
     def test_stop_recording_creates_wav(self, mock_pyaudio, tmp_path: Path):
         """Test stopping recording creates WAV file."""
-        from whisper_dictate.recorder import AudioRecorder
-
         recorder = AudioRecorder()
         recorder.start()
 
         # Simulate some audio frames
-        recorder.audio_frames = [b"\x00" * 1024, b"\x00" * 1024]
-        recorder.recording = True
+        recorder._audio_callback(_FAKE_AUDIO_FRAME, 512, {}, 0)
+        recorder._audio_callback(_FAKE_AUDIO_FRAME, 512, {}, 0)
 
         # Mock the stream
         mock_stream = MagicMock()
@@ -58,39 +99,40 @@ class TestAudioRecorder:
         assert result.suffix == ".wav"
         assert mock_stream.stop_stream.called
         assert mock_stream.close.called
+        with wave.open(str(result), "rb") as wf:
+            assert wf.getnchannels() == 1
+            assert wf.getframerate() == 16000
+            assert wf.getsampwidth() == 2
+            assert wf.getnframes() == 1024
+        recorder.cleanup_temp_file()
 
     def test_stop_recording_no_audio(self, mock_pyaudio):
         """Test stopping recording with no audio frames."""
-        from whisper_dictate.recorder import AudioRecorder
-
         recorder = AudioRecorder()
         recorder.start()
-        recorder.audio_frames = []  # No audio
+        temp_file = Path(recorder.temp_file_path)
 
         result = recorder.stop()
         assert result is None
+        assert not temp_file.exists()
 
     def test_stop_recording_not_recording(self, mock_pyaudio):
         """Test stopping when not recording returns None."""
-        from whisper_dictate.recorder import AudioRecorder
-
         recorder = AudioRecorder()
         result = recorder.stop()
         assert result is None
 
     def test_cleanup(self, mock_pyaudio):
         """Test cleanup terminates PyAudio."""
-        from whisper_dictate.recorder import AudioRecorder
-
         recorder = AudioRecorder()
+        # The PyAudio mock is shared across the session
+        mock_pyaudio.PyAudio.return_value.terminate.reset_mock()
         recorder.cleanup()
 
         mock_pyaudio.PyAudio.return_value.terminate.assert_called_once()
 
     def test_cleanup_temp_file(self, mock_pyaudio, tmp_path: Path):
         """Test cleanup_temp_file removes temp file."""
-        from whisper_dictate.recorder import AudioRecorder
-
         recorder = AudioRecorder()
         temp_file = tmp_path / "test.wav"
         temp_file.write_bytes(b"test")
@@ -101,8 +143,6 @@ class TestAudioRecorder:
 
     def test_cleanup_temp_file_no_file(self, mock_pyaudio):
         """Test cleanup_temp_file handles missing file gracefully."""
-        from whisper_dictate.recorder import AudioRecorder
-
         recorder = AudioRecorder()
         recorder.temp_file_path = None
 
@@ -111,44 +151,75 @@ class TestAudioRecorder:
 
     def test_audio_callback_stores_frames(self, mock_pyaudio):
         """Test audio callback stores frames when recording."""
-        from whisper_dictate.recorder import AudioRecorder
-
         recorder = AudioRecorder()
-        recorder.recording = True
+        recorder.start()
 
         # Simulate callback
-        in_data = b"\x00\x01" * 512  # 1024 bytes of audio
-        result = recorder._audio_callback(in_data, 512, {}, 0)
-
-        assert len(recorder.audio_frames) == 1
-        assert recorder.audio_frames[0] == in_data
+        result = recorder._audio_callback(_FAKE_AUDIO_FRAME, 512, {}, 0)
         assert result[1] == mock_pyaudio.paContinue
 
+        audio_file = recorder.stop()
+        with wave.open(str(audio_file), "rb") as wf:
+            assert wf.readframes(wf.getnframes()) == _FAKE_AUDIO_FRAME
+        recorder.cleanup_temp_file()
+
     def test_audio_callback_calls_level_callback(self, mock_pyaudio):
         """Test audio callback invokes level callback."""
-        from whisper_dictate.recorder import AudioRecorder
-
         level_callback = MagicMock()
         recorder = AudioRecorder(level_callback=level_callback)
-        recorder.recording = True
+        recorder.start()
 
-        # Simulate callback with some audio data
-        in_data = b"\x00\x10" * 512
-        recorder._audio_callback(in_data, 512, {}, 0)
+        # Simulate callbacks with some audio data; the level is only computed
+        # for every other chunk
+        recorder._audio_callback(_FAKE_AUDIO_FRAME_LOUD, 512, {}, 0)
+        recorder._audio_callback(_FAKE_AUDIO_FRAME_LOUD, 512, {}, 0)
+        recorder.stop()
 
         level_callback.assert_called_once()
         # Level should be a float between 0 and 1
         level = level_callback.call_args[0][0]
         assert 0 <= level <= 1
 
-    def test_audio_callback_ignores_when_not_recording(self, mock_pyaudio):
-        """Test audio callback ignores data when not recording."""
-        from whisper_dictate.recorder import AudioRecorder
+    def test_rms_fallback_matches_audioop(self, mock_pyaudio, monkeypatch):
+        """Test the numpy RMS used without audioop gives the same level."""
+        recorder = AudioRecorder()
+        frame = b"\x00\x10\x00\xf0" * 256  # +4096 / -4096 alternating
+        expected = 4096.0
+
+        assert recorder._rms(frame) == pytest.approx(expected)
+        monkeypatch.setattr("whisper_dictate.recorder.audioop", None)
+        assert recorder._rms(frame) == pytest.approx(expected)
+        assert recorder._rms(b"") == 0.0
 
+    def test_peek_level_reads_latest_levels(self, mock_pyaudio):
+        """Test peek_level returns the loudest recent level from the ring."""
         recorder = AudioRecorder()
-        recorder.recording = False
+        recorder.start()
+        assert recorder.peek_level() == 0.0
+
+        recorder._audio_callback(_FAKE_AUDIO_FRAME_LOUD, 512, {}, 0)
+        loud = recorder.peek_level()
+        assert 0 < loud <= 1
+
+        # Skipped chunk (stride) then a quiet chunk: the loud one is still recent
+        recorder._audio_callback(_FAKE_AUDIO_FRAME, 512, {}, 0)
+        recorder._audio_callback(_FAKE_AUDIO_FRAME, 512, {}, 0)
+        assert recorder.peek_level() == loud
+        assert recorder.peek_level(window=1) < loud
+
+        recorder.stop()
+        recorder.cleanup_temp_file()
+        recorder.start()
+        assert recorder.peek_level() == 0.0
+        recorder.stop()
+
+    def test_audio_callback_after_stop_is_harmless(self, mock_pyaudio):
+        """Test a late in-flight callback after stop() writes nothing."""
+        recorder = AudioRecorder()
+        recorder.start()
+        assert recorder.stop() is None
 
-        in_data = b"\x00\x01" * 512
-        recorder._audio_callback(in_data, 512, {}, 0)
+        result = recorder._audio_callback(_FAKE_AUDIO_FRAME, 512, {}, 0)
 
-        assert len(recorder.audio_frames) == 0
+        assert result == (_FAKE_AUDIO_FRAME, mock_pyaudio.paContinue)
+        assert recorder._wf is None
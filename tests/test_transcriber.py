@@ -1,17 +1,69 @@
 """Tests for the transcriber module."""
 
+import hashlib
+import os
+import subprocess
 from pathlib import Path
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock
 
 import pytest
 
 from whisper_dictate.transcriber import (
     Transcriber,
+    _build_local_opener,
+    _probe_download,
+    clean_output,
+    close_shared,
     download_model,
     get_available_models,
+    get_or_create,
 )
 
 
+@pytest.fixture(autouse=True)
+def no_whisper_server(monkeypatch):
+    """Use whisper-cli unless a test opts into the server."""
+    monkeypatch.setattr(
+        "whisper_dictate.transcriber.detect_whisper_server", lambda cli: None
+    )
+
+
+@pytest.fixture
+def server_transcriber(tmp_models_dir: Path, monkeypatch):
+    """Create a Transcriber backed by a mocked whisper-server process."""
+    monkeypatch.setattr(
+        "whisper_dictate.transcriber.detect_whisper_server",
+        lambda cli: "/usr/bin/whisper-server",
+    )
+    mock_popen = MagicMock()
+    mock_popen.return_value.poll.return_value = None
+    monkeypatch.setattr("subprocess.Popen", mock_popen)
+    transcriber = Transcriber(
+        model_path=tmp_models_dir / "ggml-small.en.bin",
+        whisper_cli="/usr/bin/whisper-cli",
+    )
+    yield transcriber
+    transcriber.close()
+
+
+def _http_response(body: bytes = b"", status: int = 200) -> MagicMock:
+    """Build a urlopen() context-manager response."""
+    response = MagicMock()
+    response.__enter__.return_value = response
+    response.status = status
+    response.read.return_value = body
+    return response
+
+
+@pytest.fixture
+def transcriber(tmp_models_dir: Path) -> Transcriber:
+    """Create a Transcriber with an explicit whisper-cli path."""
+    return Transcriber(
+        model_path=tmp_models_dir / "ggml-small.en.bin",
+        whisper_cli="/usr/bin/whisper-cli",
+    )
+
+
 class TestTranscriberInit:
     """Test Transcriber initialization."""
 
@@ -26,88 +78,373 @@ class TestTranscriberInit:
         assert transcriber.threads == 4
         assert transcriber.timeout == 60
 
-    def test_init_raises_without_whisper_cli(self, tmp_models_dir: Path):
+    def test_init_raises_without_whisper_cli(self, tmp_models_dir: Path, monkeypatch):
         """Test initialization raises when whisper-cli not found."""
-        with patch("whisper_dictate.transcriber.detect_whisper_cli", return_value=None):
-            with pytest.raises(RuntimeError, match="Could not find whisper-cli"):
-                Transcriber(model_path=tmp_models_dir / "ggml-small.en.bin")
+        monkeypatch.setattr(
+            "whisper_dictate.transcriber.detect_whisper_cli", lambda: None
+        )
+        with pytest.raises(RuntimeError, match="Could not find whisper-cli"):
+            Transcriber(model_path=tmp_models_dir / "ggml-small.en.bin")
 
-    def test_init_autodetects_whisper_cli(self, tmp_models_dir: Path):
+    def test_init_autodetects_whisper_cli(self, tmp_models_dir: Path, monkeypatch):
         """Test initialization auto-detects whisper-cli."""
-        with patch(
+        monkeypatch.setattr(
             "whisper_dictate.transcriber.detect_whisper_cli",
-            return_value="/detected/whisper-cli",
-        ):
-            transcriber = Transcriber(model_path=tmp_models_dir / "ggml-small.en.bin")
-            assert transcriber.whisper_cli == "/detected/whisper-cli"
+            lambda: "/detected/whisper-cli",
+        )
+        transcriber = Transcriber(model_path=tmp_models_dir / "ggml-small.en.bin")
+        assert transcriber.whisper_cli == "/detected/whisper-cli"
 
 
 class TestTranscribe:
     """Test transcription functionality."""
 
-    def test_transcribe_success(self, tmp_models_dir: Path, tmp_path: Path):
+    def test_transcribe_success(self, transcriber, tmp_path: Path, monkeypatch):
         """Test successful transcription."""
         audio_file = tmp_path / "test.wav"
         audio_file.write_bytes(b"fake audio data")
 
-        transcriber = Transcriber(
-            model_path=tmp_models_dir / "ggml-small.en.bin",
-            whisper_cli="/usr/bin/whisper-cli",
+        mock_result = subprocess.CompletedProcess(
+            args=[], returncode=0, stdout=b"Hello world\nThis is a test\n"
         )
 
-        mock_result = MagicMock()
-        mock_result.stdout = "Hello world\nThis is a test\n"
+        mock_run = MagicMock(return_value=mock_result)
+        monkeypatch.setattr("subprocess.run", mock_run)
+        result = transcriber.transcribe(audio_file)
+        assert result == "Hello world This is a test"
+        mock_run.assert_called_once()
 
-        with patch("subprocess.run", return_value=mock_result) as mock_run:
-            result = transcriber.transcribe(audio_file)
-            assert result == "Hello world This is a test"
-            mock_run.assert_called_once()
+    def test_transcribe_bytes_via_stdin(self, transcriber, monkeypatch):
+        """Test in-memory audio is piped to whisper-cli with -f -."""
+        mock_result = subprocess.CompletedProcess(
+            args=[], returncode=0, stdout=b"Hello world\n"
+        )
+        mock_run = MagicMock(return_value=mock_result)
+        monkeypatch.setattr("subprocess.run", mock_run)
 
-    def test_transcribe_timeout(self, tmp_models_dir: Path, tmp_path: Path):
+        assert transcriber.transcribe(b"fake audio data") == "Hello world"
+        argv = mock_run.call_args[0][0]
+        assert argv[argv.index("-f") + 1] == "-"
+        assert mock_run.call_args[1]["input"] == b"fake audio data"
+
+    def test_cli_command(self, transcriber, tmp_path: Path):
+        """Test the whisper-cli command line used for QProcess runs."""
+        audio_file = tmp_path / "test.wav"
+        argv = transcriber.cli_command(audio_file)
+        assert argv[0] == "/usr/bin/whisper-cli"
+        assert argv[argv.index("-f") + 1] == str(audio_file)
+        assert argv[argv.index("-m") + 1] == str(transcriber.model_path)
+        assert transcriber.server_running is False
+
+    def test_transcribe_timeout(self, transcriber, tmp_path: Path, monkeypatch):
         """Test transcription timeout handling."""
-        import subprocess
+        audio_file = tmp_path / "test.wav"
+        audio_file.write_bytes(b"fake audio data")
+
+        monkeypatch.setattr(
+            "subprocess.run",
+            MagicMock(side_effect=subprocess.TimeoutExpired("cmd", 1)),
+        )
+        result = transcriber.transcribe(audio_file)
+        assert result == ""
 
+    def test_transcribe_empty_output(self, transcriber, tmp_path: Path, monkeypatch):
+        """Test handling empty transcription output."""
         audio_file = tmp_path / "test.wav"
         audio_file.write_bytes(b"fake audio data")
 
-        transcriber = Transcriber(
-            model_path=tmp_models_dir / "ggml-small.en.bin",
-            whisper_cli="/usr/bin/whisper-cli",
-            timeout=1,
+        mock_result = subprocess.CompletedProcess(
+            args=[], returncode=0, stdout=b"\n\n\n"
         )
 
-        with patch("subprocess.run", side_effect=subprocess.TimeoutExpired("cmd", 1)):
-            result = transcriber.transcribe(audio_file)
-            assert result == ""
+        monkeypatch.setattr("subprocess.run", MagicMock(return_value=mock_result))
+        result = transcriber.transcribe(audio_file)
+        assert result == ""
+
+
+class TestCleanOutput:
+    """Test whisper output cleanup."""
+
+    @pytest.mark.parametrize(
+        "raw,expected",
+        [
+            ("Hello world\n", "Hello world"),
+            ("\n  Hello \n\n  world  \n", "Hello world"),
+            ("Hello\r\nworld", "Hello world"),
+            ("one  two", "one  two"),
+            ("\n \n", ""),
+        ],
+    )
+    def test_clean_output(self, raw, expected):
+        """Test whisper output lines are stripped and joined with spaces."""
+        assert clean_output(raw) == expected
+
+
+class TestTranscribeMany:
+    """Test batch transcription."""
+
+    def test_transcribe_many_single_cli_call(
+        self, transcriber, tmp_path: Path, monkeypatch
+    ):
+        """Test all files go through one whisper-cli run."""
+        audio_files = [tmp_path / "a.wav", tmp_path / "b.wav"]
+        for audio_file in audio_files:
+            audio_file.write_bytes(b"fake audio data")
+
+        def fake_run(cmd, **kwargs):
+            # whisper-cli --output-txt writes <file>.txt per input
+            Path(f"{audio_files[0]}.txt").write_text("First\n")
+            Path(f"{audio_files[1]}.txt").write_text(" Second\n line\n")
+            return subprocess.CompletedProcess(args=cmd, returncode=0, stdout=b"")
+
+        mock_run = MagicMock(side_effect=fake_run)
+        monkeypatch.setattr("subprocess.run", mock_run)
+
+        assert transcriber.transcribe_many(audio_files) == ["First", "Second line"]
+        mock_run.assert_called_once()
+        argv = mock_run.call_args[0][0]
+        assert "--output-txt" in argv
+        assert argv.count("-f") == 2
+        assert not list(tmp_path.glob("*.txt"))
+
+    def test_transcribe_many_missing_output(
+        self, transcriber, tmp_path: Path, monkeypatch
+    ):
+        """Test files without a transcript yield empty strings."""
+        audio_file = tmp_path / "a.wav"
+        audio_file.write_bytes(b"fake audio data")
+        monkeypatch.setattr(
+            "subprocess.run",
+            MagicMock(side_effect=subprocess.TimeoutExpired("cmd", 1)),
+        )
 
-    def test_transcribe_empty_output(self, tmp_models_dir: Path, tmp_path: Path):
-        """Test handling empty transcription output."""
+        assert transcriber.transcribe_many([audio_file]) == [""]
+
+    def test_transcribe_many_empty(self, transcriber):
+        """Test an empty batch does nothing."""
+        assert transcriber.transcribe_many([]) == []
+
+
+class TestWhisperServer:
+    """Test the persistent whisper-server backend."""
+
+    def test_server_started_once(self, server_transcriber):
+        """Test whisper-server is launched with the model on a local port."""
+        assert server_transcriber.server_running is True
+        argv = subprocess.Popen.call_args[0][0]
+        assert argv[0] == "/usr/bin/whisper-server"
+        assert str(server_transcriber.model_path) in argv
+        assert argv[argv.index("--host") + 1] == "127.0.0.1"
+        port = argv[argv.index("--port") + 1]
+        assert server_transcriber._server_url == f"http://127.0.0.1:{port}"
+
+    def test_transcribe_posts_to_server(
+        self, server_transcriber, tmp_path: Path, monkeypatch
+    ):
+        """Test transcription waits for /health and posts to /inference."""
         audio_file = tmp_path / "test.wav"
         audio_file.write_bytes(b"fake audio data")
 
-        transcriber = Transcriber(
-            model_path=tmp_models_dir / "ggml-small.en.bin",
-            whisper_cli="/usr/bin/whisper-cli",
+        mock_urlopen = MagicMock(
+            side_effect=[
+                _http_response(),
+                _http_response(b" Hello world\n This is a test\n"),
+            ]
+        )
+        monkeypatch.setattr(
+            "whisper_dictate.transcriber._LOCAL_OPENER.open", mock_urlopen
+        )
+        mock_run = MagicMock()
+        monkeypatch.setattr("subprocess.run", mock_run)
+
+        assert server_transcriber.transcribe(audio_file) == "Hello world This is a test"
+        assert mock_urlopen.call_args_list[0][0][0].endswith("/health")
+        request = mock_urlopen.call_args_list[1][0][0]
+        assert request.full_url.endswith("/inference")
+        assert b"fake audio data" in request.data
+        mock_run.assert_not_called()
+
+    def test_transcribe_many_posts_each_file(
+        self, server_transcriber, tmp_path: Path, monkeypatch
+    ):
+        """Test batch transcription sends every file to the server."""
+        audio_files = [tmp_path / "a.wav", tmp_path / "b.wav"]
+        for audio_file in audio_files:
+            audio_file.write_bytes(f"audio {audio_file.stem}".encode())
+
+        def fake_urlopen(request, timeout=None):
+            if isinstance(request, str):
+                return _http_response()  # /health
+            return _http_response(
+                b"text a" if b"audio a" in request.data else b"text b"
+            )
+
+        monkeypatch.setattr(
+            "whisper_dictate.transcriber._LOCAL_OPENER.open", fake_urlopen
+        )
+
+        assert server_transcriber.transcribe_many(audio_files) == ["text a", "text b"]
+
+    def test_falls_back_to_cli_when_server_exits(
+        self, server_transcriber, tmp_path: Path, monkeypatch
+    ):
+        """Test whisper-cli is used if the server dies while loading."""
+        audio_file = tmp_path / "test.wav"
+        audio_file.write_bytes(b"fake audio data")
+        server_transcriber._server_proc.poll.return_value = 1
+
+        mock_run = MagicMock(
+            return_value=subprocess.CompletedProcess(
+                args=[], returncode=0, stdout=b"Hello\n"
+            )
+        )
+        monkeypatch.setattr("subprocess.run", mock_run)
+
+        assert server_transcriber.transcribe(audio_file) == "Hello"
+        assert server_transcriber._server_proc is None
+        mock_run.assert_called_once()
+
+    def test_local_opener_bypasses_proxy(self, monkeypatch):
+        """Test loopback requests never go through a configured proxy."""
+        import http.server
+        import threading
+
+        class HealthHandler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                self.send_response(200)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        server = http.server.HTTPServer(("127.0.0.1", 0), HealthHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            # Nothing listens on port 9, so a proxied request would fail.
+            # Set before building the opener, which is when proxies are read
+            monkeypatch.setenv("http_proxy", "http://127.0.0.1:9")
+            monkeypatch.setenv("no_proxy", "")
+            opener = _build_local_opener()
+            url = f"http://127.0.0.1:{server.server_port}/health"
+            with opener.open(url, timeout=5) as response:
+                assert response.status == 200
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_gives_up_on_server_after_startup_budget(
+        self, server_transcriber, monkeypatch
+    ):
+        """Test a server that never gets healthy is abandoned early."""
+        monkeypatch.setattr("whisper_dictate.transcriber.SERVER_STARTUP_TIMEOUT", 0.1)
+        monkeypatch.setattr(
+            "whisper_dictate.transcriber._LOCAL_OPENER.open",
+            MagicMock(side_effect=OSError("refused")),
+        )
+        proc = server_transcriber._server_proc
+
+        assert server_transcriber.timeout == 60
+        assert server_transcriber._wait_for_server() is False
+        proc.terminate.assert_called_once()
+        assert server_transcriber.server_running is False
+
+    def test_falls_back_to_cli_when_ready_server_dies(
+        self, server_transcriber, tmp_path: Path, monkeypatch
+    ):
+        """Test a server that exits after becoming ready is noticed."""
+        audio_file = tmp_path / "test.wav"
+        audio_file.write_bytes(b"fake audio data")
+        server_transcriber._server_ready = True
+        server_transcriber._server_proc.poll.return_value = -9  # OOM-killed
+        mock_open = MagicMock()
+        monkeypatch.setattr("whisper_dictate.transcriber._LOCAL_OPENER.open", mock_open)
+        mock_run = MagicMock(
+            return_value=subprocess.CompletedProcess(
+                args=[], returncode=0, stdout=b"Hello\n"
+            )
         )
+        monkeypatch.setattr("subprocess.run", mock_run)
 
-        mock_result = MagicMock()
-        mock_result.stdout = "\n\n\n"
+        assert server_transcriber.transcribe(audio_file) == "Hello"
+        assert server_transcriber.server_running is False
+        mock_open.assert_not_called()
+        mock_run.assert_called_once()
 
-        with patch("subprocess.run", return_value=mock_result):
-            result = transcriber.transcribe(audio_file)
-            assert result == ""
+    def test_falls_back_to_cli_when_inference_connection_fails(
+        self, server_transcriber, tmp_path: Path, monkeypatch
+    ):
+        """Test a refused /inference request drops the server for the CLI."""
+        import urllib.error
+
+        audio_file = tmp_path / "test.wav"
+        audio_file.write_bytes(b"fake audio data")
+        server_transcriber._server_ready = True
+        proc = server_transcriber._server_proc
+        monkeypatch.setattr(
+            "whisper_dictate.transcriber._LOCAL_OPENER.open",
+            MagicMock(side_effect=urllib.error.URLError(ConnectionRefusedError())),
+        )
+        mock_run = MagicMock(
+            return_value=subprocess.CompletedProcess(
+                args=[], returncode=0, stdout=b"Hello\n"
+            )
+        )
+        monkeypatch.setattr("subprocess.run", mock_run)
+
+        assert server_transcriber.transcribe(audio_file) == "Hello"
+        proc.terminate.assert_called_once()
+        assert server_transcriber.server_running is False
+        mock_run.assert_called_once()
+
+    def test_close_terminates_server(self, server_transcriber):
+        """Test close() stops the server process."""
+        proc = server_transcriber._server_proc
+        server_transcriber.close()
+
+        proc.terminate.assert_called_once()
+        assert server_transcriber._server_proc is None
+
+
+class TestSharedTranscriber:
+    """Test the process-wide Transcriber."""
+
+    @pytest.fixture(autouse=True)
+    def reset_shared(self):
+        """Start and end each test without a shared instance."""
+        close_shared()
+        yield
+        close_shared()
+
+    def test_reused_for_same_settings(self, tmp_models_dir: Path):
+        """Test the same instance is returned for the same settings."""
+        model = tmp_models_dir / "ggml-small.en.bin"
+        first = get_or_create(model, whisper_cli="/usr/bin/whisper-cli")
+        assert get_or_create(model, whisper_cli="/usr/bin/whisper-cli") is first
+        assert get_or_create(model) is first
+
+    def test_replaced_when_settings_change(self, tmp_models_dir: Path):
+        """Test changed settings close the old instance and create a new one."""
+        model = tmp_models_dir / "ggml-small.en.bin"
+        first = get_or_create(model, whisper_cli="/usr/bin/whisper-cli")
+        first.close = MagicMock()
+        second = get_or_create(model, whisper_cli="/usr/bin/whisper-cli", threads=8)
+        assert second is not first
+        assert second.threads == 8
+        first.close.assert_called_once()
 
 
 class TestGetAvailableModels:
     """Test model listing."""
 
-    def test_get_available_models_with_models(self, tmp_models_dir: Path):
+    def test_get_available_models_with_models(
+        self, writable_models_dir: Path, fake_model_blob: Path
+    ):
         """Test listing available models."""
         # Create additional model files
-        (tmp_models_dir / "ggml-base.en.bin").write_bytes(b"fake")
-        (tmp_models_dir / "ggml-tiny.en.bin").write_bytes(b"fake")
+        os.link(fake_model_blob, writable_models_dir / "ggml-base.en.bin")
+        os.link(fake_model_blob, writable_models_dir / "ggml-tiny.en.bin")
 
-        models = get_available_models(tmp_models_dir)
+        models = get_available_models(writable_models_dir)
         assert len(models) == 3
         assert "ggml-small.en.bin" in models
         assert "ggml-base.en.bin" in models
@@ -125,16 +462,19 @@ class TestGetAvailableModels:
         models = get_available_models(tmp_path / "nonexistent")
         assert models == []
 
-    def test_get_available_models_filters_non_model_files(self, tmp_models_dir: Path):
+    def test_get_available_models_filters_non_model_files(
+        self, writable_models_dir: Path, fake_model_blob: Path
+    ):
         """Test that non-model files are filtered out."""
-        (tmp_models_dir / "README.md").write_text("readme")
-        (tmp_models_dir / "config.json").write_text("{}")
+        os.link(fake_model_blob, writable_models_dir / "README.md")
+        os.link(fake_model_blob, writable_models_dir / "config.json")
 
-        models = get_available_models(tmp_models_dir)
+        models = get_available_models(writable_models_dir)
         assert "README.md" not in models
         assert "config.json" not in models
 
 
+@pytest.mark.slow
 class TestDownloadModel:
     """Test model downloading."""
 
@@ -143,32 +483,164 @@ class TestDownloadModel:
         result = download_model("small.en", tmp_models_dir)
         assert result is True
 
-    def test_download_model_normalizes_name(self, tmp_path: Path):
+    def test_download_model_normalizes_name(
+        self, tmp_path: Path, mock_urlopen, monkeypatch
+    ):
         """Test model name normalization."""
         models_dir = tmp_path / "models"
         models_dir.mkdir()
 
-        with patch("urllib.request.urlopen") as mock_urlopen:
-            mock_response = MagicMock()
-            mock_response.__enter__ = MagicMock(return_value=mock_response)
-            mock_response.__exit__ = MagicMock(return_value=False)
-            mock_response.read = MagicMock(return_value=b"model data")
-            mock_urlopen.return_value = mock_response
-
-            # Test that "small.en" becomes "ggml-small.en.bin"
-            with patch("shutil.copyfileobj"):
-                download_model("small.en", models_dir)
-                # Check the URL was constructed correctly
-                call_args = mock_urlopen.call_args[0][0]
-                assert "ggml-small.en.bin" in call_args
-
-    def test_download_model_failure(self, tmp_path: Path):
+        # Test that "small.en" becomes "ggml-small.en.bin"
+        monkeypatch.setattr("shutil.copyfileobj", MagicMock())
+        download_model("small.en", models_dir)
+        # Check the URL was constructed correctly
+        call_args = mock_urlopen.call_args[0][0]
+        assert "ggml-small.en.bin" in call_args
+
+    def test_download_model_failure(self, tmp_path: Path, mock_urlopen):
         """Test handling download failure."""
         models_dir = tmp_path / "models"
         models_dir.mkdir()
 
-        with patch("urllib.request.urlopen", side_effect=Exception("Network error")):
-            result = download_model("tiny.en", models_dir)
-            assert result is False
-            # Ensure partial file is cleaned up
-            assert not (models_dir / "ggml-tiny.en.bin").exists()
+        mock_urlopen.side_effect = Exception("Network error")
+        result = download_model("tiny.en", models_dir)
+        assert result is False
+        # Ensure partial file is cleaned up
+        assert list(models_dir.iterdir()) == []
+
+    def test_download_model_survives_probe_failure(
+        self, tmp_path: Path, mock_urlopen, monkeypatch
+    ):
+        """Test a failed probe falls back to a plain download."""
+        monkeypatch.setattr(
+            "whisper_dictate.transcriber._probe_download",
+            MagicMock(side_effect=OSError("HEAD not allowed")),
+        )
+        mock_urlopen.return_value.__enter__.return_value.read.side_effect = [
+            b"model data",
+            b"",
+        ]
+        assert download_model("tiny.en", tmp_path) is True
+        assert (tmp_path / "ggml-tiny.en.bin").read_bytes() == b"model data"
+
+    def test_download_model_interrupt_leaves_no_file(
+        self, tmp_path: Path, mock_urlopen
+    ):
+        """Test Ctrl-C mid-download removes the partial file and propagates."""
+        mock_urlopen.return_value.__enter__.return_value.read.side_effect = [
+            b"model data",
+            KeyboardInterrupt,
+        ]
+        with pytest.raises(KeyboardInterrupt):
+            download_model("tiny.en", tmp_path)
+        assert list(tmp_path.iterdir()) == []
+
+    def test_download_model_parallel_ranges(
+        self, tmp_path: Path, mock_urlopen, monkeypatch
+    ):
+        """Test large files are fetched in byte ranges and verified."""
+        data = os.urandom(1000)
+        monkeypatch.setattr("whisper_dictate.transcriber.DOWNLOAD_PARALLEL_MIN", 100)
+        monkeypatch.setattr(
+            "whisper_dictate.transcriber._probe_download",
+            lambda url: (url, len(data), hashlib.sha256(data).hexdigest(), True),
+        )
+
+        def urlopen(request):
+            lo, hi = map(int, request.headers["Range"][6:].split("-"))
+            response = MagicMock()
+            response.status = 206
+            response.read.side_effect = [data[lo : hi + 1], b""]
+            response.__enter__.return_value = response
+            return response
+
+        mock_urlopen.side_effect = urlopen
+        assert download_model("tiny.en", tmp_path) is True
+        assert (tmp_path / "ggml-tiny.en.bin").read_bytes() == data
+        assert mock_urlopen.call_count == 8
+
+    def test_download_model_checksum_mismatch(
+        self, tmp_path: Path, mock_urlopen, monkeypatch
+    ):
+        """Test a download that fails its checksum is removed."""
+        monkeypatch.setattr(
+            "whisper_dictate.transcriber._probe_download",
+            lambda url: (url, None, "0" * 64, False),
+        )
+        mock_urlopen.return_value.__enter__.return_value.read.side_effect = [
+            b"model data",
+            b"",
+        ]
+        assert download_model("tiny.en", tmp_path) is False
+        assert list(tmp_path.iterdir()) == []
+
+    def test_download_model_falls_back_without_ranges(
+        self, tmp_path: Path, mock_urlopen, monkeypatch
+    ):
+        """Test a server that ignores Range gets a single full download."""
+        data = os.urandom(1000)
+        monkeypatch.setattr("whisper_dictate.transcriber.DOWNLOAD_PARALLEL_MIN", 100)
+        monkeypatch.setattr(
+            "whisper_dictate.transcriber._probe_download",
+            lambda url: (url, len(data), hashlib.sha256(data).hexdigest(), True),
+        )
+
+        def urlopen(request):
+            # Range header or not, the whole file comes back with 200
+            response = _http_response(status=200)
+            response.read.side_effect = [data, b""]
+            return response
+
+        mock_urlopen.side_effect = urlopen
+        assert download_model("tiny.en", tmp_path) is True
+        assert (tmp_path / "ggml-tiny.en.bin").read_bytes() == data
+        assert isinstance(mock_urlopen.call_args[0][0], str)
+
+    def test_probe_keeps_head_across_redirect(self, monkeypatch):
+        """Test the probe reads LFS headers from the redirect without a GET."""
+        sha256 = "ab" * 32
+        cdn_url = "https://cdn.example/blob"
+        requests = []
+
+        def build_opener(handler):
+            # Follow one Hugging Face style redirect through the real handler
+            def open_(request):
+                redirect = handler.redirect_request(
+                    request,
+                    None,
+                    302,
+                    "Found",
+                    {"Location": cdn_url, "X-Linked-Etag": f'"{sha256}"'},
+                    cdn_url,
+                )
+                requests.extend([request, redirect])
+                response = _http_response()
+                response.geturl.return_value = redirect.full_url
+                response.headers = {"Content-Length": "1234", "Accept-Ranges": "bytes"}
+                return response
+
+            opener = MagicMock()
+            opener.open.side_effect = open_
+            return opener
+
+        monkeypatch.setattr("urllib.request.build_opener", build_opener)
+        result = _probe_download("https://huggingface.co/ggml-tiny.en.bin")
+
+        assert result == (cdn_url, 1234, sha256, True)
+        assert [r.get_method() for r in requests] == ["HEAD", "HEAD"]
+
+    def test_probe_ignores_non_sha256_etag(self, monkeypatch):
+        """Test a missing or non-LFS etag yields no checksum."""
+        response = _http_response()
+        response.geturl.return_value = "https://huggingface.co/small.bin"
+        response.headers = {}
+        opener = MagicMock()
+        opener.open.return_value = response
+        monkeypatch.setattr("urllib.request.build_opener", lambda handler: opener)
+
+        assert _probe_download("https://huggingface.co/small.bin") == (
+            "https://huggingface.co/small.bin",
+            None,
+            None,
+            False,
+        )
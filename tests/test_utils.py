@@ -1,71 +1,162 @@
 """Tests for the utils module."""
 
 import os
-import signal
+import socket
+import subprocess
+import sys
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import pytest
 
 from whisper_dictate.utils import (
-    PID_FILE,
-    cleanup_pid,
+    _reset_detection_cache,
+    _scan_path_tools,
+    _socket_address,
+    _xtest_type,
+    claim_instance,
     copy_to_clipboard,
     detect_clipboard_tool,
     detect_display_server,
     detect_typing_tool,
+    detect_typing_tools,
     detect_whisper_cli,
-    is_already_running,
+    detect_whisper_server,
+    read_command,
+    send_command,
     type_text,
-    write_pid,
 )
 
 
-class TestPidFileManagement:
-    """Test PID file operations."""
-
-    def test_write_pid_creates_file(self, tmp_path: Path, monkeypatch):
-        """Test write_pid creates PID file with current PID."""
-        pid_file = tmp_path / "test.pid"
-        monkeypatch.setattr("whisper_dictate.utils.PID_FILE", pid_file)
-
-        write_pid()
-        assert pid_file.exists()
-        assert pid_file.read_text() == str(os.getpid())
-
-    def test_cleanup_pid_removes_file(self, tmp_path: Path, monkeypatch):
-        """Test cleanup_pid removes PID file."""
-        pid_file = tmp_path / "test.pid"
-        pid_file.write_text("12345")
-        monkeypatch.setattr("whisper_dictate.utils.PID_FILE", pid_file)
-
-        cleanup_pid()
-        assert not pid_file.exists()
-
-    def test_cleanup_pid_handles_missing_file(self, tmp_path: Path, monkeypatch):
-        """Test cleanup_pid handles non-existent file gracefully."""
-        pid_file = tmp_path / "nonexistent.pid"
-        monkeypatch.setattr("whisper_dictate.utils.PID_FILE", pid_file)
-
-        # Should not raise
-        cleanup_pid()
-
-    def test_is_already_running_no_pid_file(self, tmp_path: Path, monkeypatch):
-        """Test is_already_running returns False when no PID file."""
-        pid_file = tmp_path / "nonexistent.pid"
-        monkeypatch.setattr("whisper_dictate.utils.PID_FILE", pid_file)
-
-        assert is_already_running() is False
-
-    def test_is_already_running_stale_pid(self, tmp_path: Path, monkeypatch):
-        """Test is_already_running cleans up stale PID file."""
-        pid_file = tmp_path / "test.pid"
-        pid_file.write_text("999999")  # Non-existent PID
-        monkeypatch.setattr("whisper_dictate.utils.PID_FILE", pid_file)
-
-        result = is_already_running()
-        assert result is False
-        assert not pid_file.exists()  # Stale file cleaned up
+@pytest.fixture(autouse=True)
+def reset_detection_cache():
+    """Clear cached detection results so each test sees its own mocks."""
+    _reset_detection_cache()
+    yield
+    _reset_detection_cache()
+
+
+@pytest.fixture
+def socket_address(tmp_path: Path, monkeypatch) -> str:
+    """Use a per-test socket address so a real running instance is untouched."""
+    address = f"\0whisper-dictate-test-{os.getpid()}-{tmp_path.name}"
+    monkeypatch.setattr("whisper_dictate.utils._socket_address", lambda: address)
+    return address
+
+
+class TestSingleInstance:
+    """Test single-instance socket IPC."""
+
+    def test_socket_address_is_per_user(self):
+        """Test the address is abstract and scoped to the current user."""
+        address = _socket_address()
+        assert address.startswith("\0")
+        assert address.endswith(str(os.getuid()))
+
+    def test_claim_instance_when_not_running(self, socket_address):
+        """Test the first invocation gets the listening socket."""
+        server = claim_instance()
+        assert server is not None
+        server.close()
+
+    def test_claim_instance_tells_running_instance_to_stop(self, socket_address):
+        """Test a second invocation sends stop and does not claim."""
+        server = claim_instance()
+        try:
+            assert claim_instance() is None
+            assert read_command(server) == "stop"
+        finally:
+            server.close()
+
+    def test_claim_instance_after_owner_closed(self, socket_address):
+        """Test the address is free again once the owner closes it."""
+        claim_instance().close()
+        server = claim_instance()
+        assert server is not None
+        server.close()
+
+    def test_send_command_without_instance(self, socket_address):
+        """Test send_command returns False when nothing is listening."""
+        assert send_command("stop") is False
+
+    def test_read_command_ignores_other_users(self, socket_address):
+        """Test commands from another user's process are dropped."""
+        server = claim_instance()
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+                client.connect(socket_address)
+                client.sendall(b"stop\n")
+                with patch(
+                    "whisper_dictate.utils._peer_uid", return_value=os.getuid() + 1
+                ):
+                    assert read_command(server) is None
+        finally:
+            server.close()
+
+    def test_send_command_refuses_other_users_instance(self, socket_address):
+        """Test a socket squatted by another user is reported, not obeyed."""
+        server = claim_instance()
+        try:
+            with patch("whisper_dictate.utils._peer_uid", return_value=os.getuid() + 1):
+                with pytest.raises(RuntimeError, match="another user"):
+                    send_command("stop")
+        finally:
+            server.close()
+
+    def test_claim_instance_fails_when_owner_unreachable(self, socket_address):
+        """Test an address that is held but never answers is an error."""
+        server = claim_instance()
+        try:
+            with patch("whisper_dictate.utils.send_command", return_value=False):
+                with pytest.raises(RuntimeError, match="Could not claim"):
+                    claim_instance()
+        finally:
+            server.close()
+
+
+def _make_executable(directory: Path, name: str) -> Path:
+    """Create an executable placeholder file."""
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / name
+    path.touch()
+    path.chmod(0o755)
+    return path
+
+
+class TestPathScan:
+    """Test the single-pass $PATH scan."""
+
+    def test_scan_finds_known_tools(self, tmp_path: Path, monkeypatch):
+        """Test known executables are found and unrelated files ignored."""
+        bin_dir = tmp_path / "bin"
+        wl_copy = _make_executable(bin_dir, "wl-copy")
+        _make_executable(bin_dir, "unrelated")
+        monkeypatch.setenv("PATH", str(bin_dir))
+
+        assert _scan_path_tools() == {"wl-copy": str(wl_copy)}
+
+    def test_scan_prefers_earlier_path_entries(self, tmp_path: Path, monkeypatch):
+        """Test the first PATH directory wins, like shutil.which."""
+        first = _make_executable(tmp_path / "first", "xclip")
+        _make_executable(tmp_path / "second", "xclip")
+        monkeypatch.setenv(
+            "PATH", os.pathsep.join([str(tmp_path / "first"), str(tmp_path / "second")])
+        )
+
+        assert _scan_path_tools()["xclip"] == str(first)
+
+    def test_scan_skips_non_executables_and_missing_dirs(
+        self, tmp_path: Path, monkeypatch
+    ):
+        """Test non-executable files and missing directories are skipped."""
+        bin_dir = tmp_path / "bin"
+        bin_dir.mkdir()
+        (bin_dir / "xdotool").touch()
+        monkeypatch.setenv(
+            "PATH", os.pathsep.join([str(tmp_path / "missing"), str(bin_dir)])
+        )
+
+        assert _scan_path_tools() == {}
 
 
 class TestToolDetection:
@@ -73,66 +164,165 @@ class TestToolDetection:
 
     def test_detect_clipboard_tool_wl_copy(self):
         """Test detecting wl-copy."""
-        with patch("shutil.which") as mock_which:
-            mock_which.side_effect = lambda x: (
-                "/usr/bin/wl-copy" if x == "wl-copy" else None
-            )
-            assert detect_clipboard_tool() == "wl-copy"
+        with patch(
+            "whisper_dictate.utils._scan_path_tools",
+            return_value={"wl-copy": "/usr/bin/wl-copy", "xclip": "/usr/bin/xclip"},
+        ):
+            assert detect_clipboard_tool() == "/usr/bin/wl-copy"
 
     def test_detect_clipboard_tool_xclip(self):
         """Test detecting xclip when wl-copy not available."""
-        with patch("shutil.which") as mock_which:
-            mock_which.side_effect = lambda x: (
-                "/usr/bin/xclip" if x == "xclip" else None
-            )
-            assert detect_clipboard_tool() == "xclip"
+        with patch(
+            "whisper_dictate.utils._scan_path_tools",
+            return_value={"xclip": "/usr/bin/xclip"},
+        ):
+            assert detect_clipboard_tool() == "/usr/bin/xclip"
 
     def test_detect_clipboard_tool_pbcopy(self):
         """Test detecting pbcopy when others not available."""
-        with patch("shutil.which") as mock_which:
-            mock_which.side_effect = lambda x: (
-                "/usr/bin/pbcopy" if x == "pbcopy" else None
-            )
-            assert detect_clipboard_tool() == "pbcopy"
+        with patch(
+            "whisper_dictate.utils._scan_path_tools",
+            return_value={"pbcopy": "/usr/bin/pbcopy"},
+        ):
+            assert detect_clipboard_tool() == "/usr/bin/pbcopy"
 
     def test_detect_clipboard_tool_none(self):
         """Test returns None when no clipboard tool found."""
-        with patch("shutil.which", return_value=None):
+        with patch("whisper_dictate.utils._scan_path_tools", return_value={}):
             assert detect_clipboard_tool() is None
 
+    def test_detect_typing_tool_wtype_on_wayland(self, monkeypatch):
+        """Test wtype is preferred on Wayland."""
+        monkeypatch.setenv("WAYLAND_DISPLAY", "wayland-0")
+        with patch(
+            "whisper_dictate.utils._scan_path_tools",
+            return_value={"wtype": "/usr/bin/wtype", "ydotool": "/usr/bin/ydotool"},
+        ):
+            assert detect_typing_tool() == "/usr/bin/wtype"
+
+    def test_detect_typing_tool_dotool_without_wayland(self, monkeypatch):
+        """Test wtype is skipped outside Wayland and dotool beats ydotool."""
+        monkeypatch.delenv("WAYLAND_DISPLAY", raising=False)
+        with patch(
+            "whisper_dictate.utils._scan_path_tools",
+            return_value={
+                "wtype": "/usr/bin/wtype",
+                "dotool": "/usr/bin/dotool",
+                "ydotool": "/usr/bin/ydotool",
+            },
+        ):
+            assert detect_typing_tool() == "/usr/bin/dotool"
+
     def test_detect_typing_tool_ydotool(self):
         """Test detecting ydotool."""
-        with patch("shutil.which") as mock_which:
-            mock_which.side_effect = lambda x: (
-                "/usr/bin/ydotool" if x == "ydotool" else None
-            )
-            assert detect_typing_tool() == "ydotool"
+        with patch(
+            "whisper_dictate.utils._scan_path_tools",
+            return_value={"ydotool": "/usr/bin/ydotool", "xdotool": "/usr/bin/xdotool"},
+        ):
+            assert detect_typing_tool() == "/usr/bin/ydotool"
 
     def test_detect_typing_tool_xdotool(self):
         """Test detecting xdotool when ydotool not available."""
-        with patch("shutil.which") as mock_which:
-            mock_which.side_effect = lambda x: (
-                "/usr/bin/xdotool" if x == "xdotool" else None
+        with patch(
+            "whisper_dictate.utils._scan_path_tools",
+            return_value={"xdotool": "/usr/bin/xdotool"},
+        ):
+            assert detect_typing_tool() == "/usr/bin/xdotool"
+
+    def test_detect_typing_tools_lists_fallbacks(self, monkeypatch):
+        """Test every available typing tool is returned in preference order."""
+        monkeypatch.setenv("WAYLAND_DISPLAY", "wayland-0")
+        with patch(
+            "whisper_dictate.utils._scan_path_tools",
+            return_value={
+                "xdotool": "/usr/bin/xdotool",
+                "wtype": "/usr/bin/wtype",
+                "ydotool": "/usr/bin/ydotool",
+            },
+        ):
+            assert detect_typing_tools() == (
+                "/usr/bin/wtype",
+                "/usr/bin/ydotool",
+                "/usr/bin/xdotool",
             )
-            assert detect_typing_tool() == "xdotool"
 
     def test_detect_typing_tool_none(self):
         """Test returns None when no typing tool found."""
-        with patch("shutil.which", return_value=None):
+        with patch("whisper_dictate.utils._scan_path_tools", return_value={}):
             assert detect_typing_tool() is None
 
     def test_detect_whisper_cli_from_path(self):
         """Test detecting whisper-cli from PATH."""
-        with patch("shutil.which") as mock_which:
-            mock_which.side_effect = lambda x: (
-                "/usr/bin/whisper-cli" if x == "whisper-cli" else None
-            )
+        with patch(
+            "whisper_dictate.utils._scan_path_tools",
+            return_value={"whisper-cli": "/usr/bin/whisper-cli"},
+        ):
             assert detect_whisper_cli() == "/usr/bin/whisper-cli"
 
-    def test_detect_whisper_cli_from_common_paths(self, tmp_path: Path):
+    def test_detection_is_cached(self):
+        """Test repeated detection does not re-scan PATH."""
+        with patch(
+            "whisper_dictate.utils._scan_path_tools",
+            return_value={"wl-copy": "/usr/bin/wl-copy"},
+        ) as mock_scan:
+            assert detect_clipboard_tool() == "/usr/bin/wl-copy"
+            assert detect_clipboard_tool() == "/usr/bin/wl-copy"
+            assert mock_scan.call_count == 1
+
+    def test_detect_whisper_cli_from_common_paths(self, tmp_path: Path, monkeypatch):
         """Test detecting whisper-cli from common installation paths."""
-        with patch("shutil.which", return_value=None):
-            with patch.object(Path, "exists", return_value=False):
+        local_bin = tmp_path / ".local" / "bin"
+        monkeypatch.setattr(Path, "home", lambda: tmp_path)
+        with patch("whisper_dictate.utils._scan_path_tools", return_value={}):
+            # Hide any real installs under /usr/bin and /usr/local/bin
+            with patch(
+                "os.listdir",
+                side_effect=lambda d: (["whisper-cli"] if d == local_bin else []),
+            ):
+                assert detect_whisper_cli() == str(local_bin / "whisper-cli")
+
+    def test_detect_whisper_server_next_to_cli(self, tmp_path: Path):
+        """Test the server installed beside the CLI is preferred."""
+        server = _make_executable(tmp_path, "whisper-server")
+        with patch(
+            "whisper_dictate.utils._scan_path_tools",
+            return_value={"whisper-server": "/usr/bin/whisper-server"},
+        ):
+            assert detect_whisper_server(str(tmp_path / "whisper-cli")) == str(server)
+
+    def test_detect_whisper_server_from_path(self, tmp_path: Path):
+        """Test falling back to whisper-server on PATH."""
+        with patch(
+            "whisper_dictate.utils._scan_path_tools",
+            return_value={"whisper-server": "/usr/bin/whisper-server"},
+        ):
+            assert (
+                detect_whisper_server(str(tmp_path / "whisper-cli"))
+                == "/usr/bin/whisper-server"
+            )
+
+        _reset_detection_cache()
+        with patch("whisper_dictate.utils._scan_path_tools", return_value={}):
+            assert detect_whisper_server(str(tmp_path / "whisper-cli")) is None
+
+    @pytest.mark.parametrize(
+        "detect",
+        [detect_typing_tools, detect_whisper_cli, lambda: detect_whisper_server("x")],
+    )
+    def test_other_detection_is_cached(self, detect):
+        """Test every PATH-based detector scans only once."""
+        with patch(
+            "whisper_dictate.utils._scan_path_tools", return_value={}
+        ) as mock_scan:
+            with patch("os.listdir", return_value=[]):
+                detect()
+                detect()
+        assert mock_scan.call_count == 1
+
+    def test_detect_whisper_cli_not_found(self):
+        """Test returns None when whisper-cli is not installed anywhere."""
+        with patch("whisper_dictate.utils._scan_path_tools", return_value={}):
+            with patch("os.listdir", side_effect=FileNotFoundError):
                 assert detect_whisper_cli() is None
 
 
@@ -169,7 +359,9 @@ class TestClipboardOperations:
             ):
                 result = copy_to_clipboard("test text")
                 assert result is True
-                mock_run.assert_called_once_with(["wl-copy", "test text"], check=True)
+                mock_run.assert_called_once_with(
+                    ["wl-copy"], input=b"test text", check=True
+                )
 
     def test_copy_to_clipboard_xclip(self):
         """Test copying with xclip."""
@@ -183,31 +375,160 @@ class TestClipboardOperations:
                 args = mock_run.call_args
                 assert args[0][0] == ["xclip", "-selection", "clipboard"]
 
+    def test_copy_to_clipboard_uses_detected_path(self):
+        """Test the detected full path is executed directly."""
+        with patch("subprocess.run") as mock_run:
+            with patch(
+                "whisper_dictate.utils.detect_clipboard_tool",
+                return_value="/usr/bin/wl-copy",
+            ):
+                assert copy_to_clipboard("test text") is True
+                mock_run.assert_called_once_with(
+                    ["/usr/bin/wl-copy"], input=b"test text", check=True
+                )
+
     def test_copy_to_clipboard_no_tool(self):
         """Test copying returns False when no tool available."""
         with patch("whisper_dictate.utils.detect_clipboard_tool", return_value=None):
             result = copy_to_clipboard("test text")
             assert result is False
 
+    def test_copy_to_clipboard_unknown_tool(self):
+        """Test copying with an unsupported tool runs nothing."""
+        with patch("subprocess.run") as mock_run:
+            assert copy_to_clipboard("test text", tool="/usr/bin/xsel") is False
+            mock_run.assert_not_called()
+
+    def test_copy_to_clipboard_tool_fails(self):
+        """Test copying returns False when the tool exits with an error."""
+        error = subprocess.CalledProcessError(1, "wl-copy")
+        with patch("subprocess.run", side_effect=error):
+            assert copy_to_clipboard("test text", tool="wl-copy") is False
+
 
 class TestTypingOperations:
     """Test typing operations."""
 
+    @pytest.fixture(autouse=True)
+    def no_display(self, monkeypatch):
+        """Keep real XTEST typing out of tests run under a live X server."""
+        monkeypatch.delenv("DISPLAY", raising=False)
+        monkeypatch.delenv("WAYLAND_DISPLAY", raising=False)
+
+    def test_type_text_prefers_xtest_on_x11(self, monkeypatch):
+        """Test X11 typing happens in-process when XTEST is available."""
+        monkeypatch.delenv("WAYLAND_DISPLAY", raising=False)
+        monkeypatch.setenv("DISPLAY", ":0")
+        with patch("subprocess.run") as mock_run:
+            with patch("whisper_dictate.utils._xtest_type", return_value=True):
+                assert type_text("test text") is True
+        mock_run.assert_not_called()
+
+    def test_xtest_type_presses_shift_for_shifted_keys(self, monkeypatch):
+        """Test XTEST typing maps characters to keycodes and shift state."""
+        xlib = MagicMock()
+        monkeypatch.setitem(sys.modules, "Xlib", xlib)
+        monkeypatch.setitem(sys.modules, "Xlib.ext", xlib.ext)
+        conn = xlib.display.Display.return_value
+        conn.keysym_to_keycode.return_value = 50  # Shift_L
+        keymap = {ord("a"): [(38, 0)], ord("A"): [(38, 1)]}
+        conn.keysym_to_keycodes.side_effect = lambda keysym: iter(
+            keymap.get(keysym, [])
+        )
+        press, release = xlib.X.KeyPress, xlib.X.KeyRelease
+
+        assert _xtest_type("aA") is True
+        events = [c.args[1:] for c in xlib.ext.xtest.fake_input.call_args_list]
+        assert events == [
+            (press, 38),
+            (release, 38),
+            (press, 50),
+            (press, 38),
+            (release, 38),
+            (release, 50),
+        ]
+
+        # Unmapped characters type nothing so a tool can take over
+        xlib.ext.xtest.fake_input.reset_mock()
+        assert _xtest_type("a\u2026") is False
+        xlib.ext.xtest.fake_input.assert_not_called()
+
+    def test_type_text_wtype(self):
+        """Test typing with wtype."""
+        with patch("subprocess.run") as mock_run:
+            with patch(
+                "whisper_dictate.utils.detect_typing_tools", return_value=("wtype",)
+            ):
+                result = type_text("test text")
+                assert result is True
+                mock_run.assert_called_once_with(
+                    ["wtype", "--", "test text"], check=True
+                )
+
+    def test_type_text_dotool(self):
+        """Test typing with dotool."""
+        with patch("subprocess.run") as mock_run:
+            with patch(
+                "whisper_dictate.utils.detect_typing_tools", return_value=("dotool",)
+            ):
+                result = type_text("test text")
+                assert result is True
+                mock_run.assert_called_once_with(
+                    ["dotool"], input="type test text\n", text=True, check=True
+                )
+
+    def test_type_text_dotool_multiline(self):
+        """Test line breaks become Enter presses instead of dotool commands."""
+        with patch("subprocess.run") as mock_run:
+            assert type_text("first\nkey ctrl+w\n\nlast", tool="dotool") is True
+            assert mock_run.call_args.kwargs["input"] == (
+                "type first\nkey enter\ntype key ctrl+w\nkey enter\n"
+                "key enter\ntype last\n"
+            )
+
+    def test_type_text_falls_back_to_next_tool(self):
+        """Test a failing tool (wtype off wlroots) hands over to the next one."""
+        error = subprocess.CalledProcessError(1, "wtype")
+        with patch("subprocess.run", side_effect=[error, None]) as mock_run:
+            with patch(
+                "whisper_dictate.utils.detect_typing_tools",
+                return_value=("/usr/bin/wtype", "/usr/bin/dotool"),
+            ):
+                assert type_text("test text") is True
+        assert [c.args[0][0] for c in mock_run.call_args_list] == [
+            "/usr/bin/wtype",
+            "/usr/bin/dotool",
+        ]
+
+    def test_type_text_all_tools_fail(self):
+        """Test typing returns False when every tool fails."""
+        with patch("subprocess.run", side_effect=FileNotFoundError("gone")):
+            with patch(
+                "whisper_dictate.utils.detect_typing_tools",
+                return_value=("/usr/bin/dotool", "/usr/bin/xdotool"),
+            ):
+                assert type_text("test text") is False
+
     def test_type_text_ydotool(self):
-        """Test typing with ydotool."""
+        """Test typing with ydotool disables its per-key delay."""
         with patch("subprocess.run") as mock_run:
             with patch(
-                "whisper_dictate.utils.detect_typing_tool", return_value="ydotool"
+                "whisper_dictate.utils.detect_typing_tools", return_value=("ydotool",)
             ):
                 result = type_text("test text")
                 assert result is True
-                mock_run.assert_called_once()
+                mock_run.assert_called_once_with(
+                    ["ydotool", "type", "--key-delay", "0", "--file", "-"],
+                    input="test text",
+                    text=True,
+                    check=True,
+                )
 
     def test_type_text_xdotool(self):
         """Test typing with xdotool."""
         with patch("subprocess.run") as mock_run:
             with patch(
-                "whisper_dictate.utils.detect_typing_tool", return_value="xdotool"
+                "whisper_dictate.utils.detect_typing_tools", return_value=("xdotool",)
             ):
                 result = type_text("test text")
                 assert result is True
@@ -217,6 +538,12 @@ class TestTypingOperations:
 
     def test_type_text_no_tool(self):
         """Test typing returns False when no tool available."""
-        with patch("whisper_dictate.utils.detect_typing_tool", return_value=None):
+        with patch("whisper_dictate.utils.detect_typing_tools", return_value=()):
             result = type_text("test text")
             assert result is False
+
+    def test_type_text_unknown_tool(self):
+        """Test typing with an unsupported tool runs nothing."""
+        with patch("subprocess.run") as mock_run:
+            assert type_text("test text", tool="/usr/bin/kdotool") is False
+            mock_run.assert_not_called()
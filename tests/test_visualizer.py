@@ -2,6 +2,7 @@
 
 import os
 
+import numpy as np
 import pytest
 
 # Skip Qt tests if no display is available
@@ -50,8 +51,12 @@ class TestDotVisualizer:
         widget = DotVisualizer(theme="google")
         qtbot.addWidget(widget)
 
+        old_pixmaps = widget._dot_pixmaps
         widget.set_theme("purple")
         assert widget.colors == THEMES["purple"]
+        # Dot sprites are re-rendered for the new colors
+        assert len(widget._dot_pixmaps) == len(THEMES["purple"])
+        assert widget._dot_pixmaps is not old_pixmaps
 
     def test_set_audio_level(self, qtbot):
         """Test setting audio level."""
@@ -87,7 +92,120 @@ class TestDotVisualizer:
         widget.animate()
 
         # Heights should have changed
-        assert widget.dot_heights != initial_heights
+        assert not np.array_equal(widget.dot_heights, initial_heights)
+
+    def test_animate_target_heights(self, qtbot):
+        """Test target heights follow the per-dot wave scaled by the level."""
+        import math
+
+        from whisper_dictate.visualizer import NUM_DOTS, DotVisualizer
+
+        widget = DotVisualizer()
+        qtbot.addWidget(widget)
+        widget.audio_level = 0.5
+
+        widget.animate()
+        expected = [
+            0.2 + (math.sin(widget.phase + i * 0.8) * 0.5 + 0.5) * 0.5 * 0.8
+            for i in range(NUM_DOTS)
+        ]
+        assert np.allclose(widget.target_heights, expected)
+
+    def test_animate_repaints_only_moved_dots(self, qtbot, monkeypatch):
+        """Test animate() invalidates just the columns of dots that moved."""
+        from unittest.mock import MagicMock
+
+        from whisper_dictate.visualizer import DotVisualizer
+
+        widget = DotVisualizer()
+        qtbot.addWidget(widget)
+        widget.dot_heights[:] = 0.2
+        widget._painted_heights[:] = 0.2
+        update = MagicMock()
+        monkeypatch.setattr(widget, "update", update)
+
+        # Silent: every dot already sits at its target
+        widget.animate()
+        update.assert_not_called()
+
+        widget._painted_heights[1] = 0.5
+        widget.animate()
+        region = update.call_args[0][0]
+        assert region.boundingRect() == widget._dot_columns[1]
+
+    def test_animate_catches_up_late_frames(self, qtbot, monkeypatch):
+        """Test a late tick advances the animation by the elapsed time."""
+        from whisper_dictate.visualizer import DotVisualizer
+
+        widget = DotVisualizer()
+        qtbot.addWidget(widget)
+        widget.dot_heights[:] = 0.0
+
+        # Three 30ms frames' worth of time since the last tick
+        widget._last_frame = 100.0
+        monkeypatch.setattr("whisper_dictate.visualizer.time.monotonic", lambda: 100.09)
+        widget.animate()
+
+        assert widget.phase == pytest.approx(0.45)
+        expected = widget.target_heights * (1 - 0.7**3)
+        assert widget.dot_heights == pytest.approx(expected)
+
+    def test_animate_caps_long_gaps(self, qtbot, monkeypatch):
+        """Test a long pause does not fast-forward the animation."""
+        from whisper_dictate.visualizer import DotVisualizer
+
+        widget = DotVisualizer()
+        qtbot.addWidget(widget)
+
+        widget._last_frame = 100.0
+        monkeypatch.setattr("whisper_dictate.visualizer.time.monotonic", lambda: 160.0)
+        widget.animate()
+
+        # Capped at one second, i.e. 1 / 0.03 frames
+        assert widget.phase == pytest.approx(0.15 / 0.03)
+
+    def test_animate_polls_level_source(self, qtbot):
+        """Test animate() reads the level from level_source."""
+        from whisper_dictate.visualizer import DotVisualizer
+
+        widget = DotVisualizer(level_source=lambda: 0.25)
+        qtbot.addWidget(widget)
+
+        widget.animate()
+        assert widget.audio_level == 0.5
+
+    def test_timer_slows_down_during_silence(self, qtbot):
+        """Test the animation drops to the idle rate and speeds back up."""
+        from whisper_dictate.visualizer import (
+            ACTIVE_INTERVAL,
+            IDLE_DELAY,
+            IDLE_INTERVAL,
+            DotVisualizer,
+        )
+
+        widget = DotVisualizer(level_source=lambda: 0.0)
+        qtbot.addWidget(widget)
+        assert widget.anim_timer.interval() == ACTIVE_INTERVAL
+
+        widget._last_active -= IDLE_DELAY + 0.1
+        widget.animate()
+        assert widget.anim_timer.interval() == IDLE_INTERVAL
+
+        widget.set_audio_level(0.5)
+        assert widget.anim_timer.interval() == ACTIVE_INTERVAL
+
+    def test_set_processing(self, qtbot):
+        """Test set_processing() detaches the level source and slows down."""
+        from whisper_dictate.visualizer import PROCESSING_INTERVAL, DotVisualizer
+
+        widget = DotVisualizer(level_source=lambda: 0.5)
+        qtbot.addWidget(widget)
+
+        widget.set_processing()
+        widget.animate()
+        assert widget.level_source is None
+        assert widget.audio_level == 0
+        assert widget.anim_timer.interval() == PROCESSING_INTERVAL
 
     def test_stop_stops_timer(self, qtbot):
         """Test stop() stops the animation timer."""
@@ -123,6 +241,22 @@ class TestDotVisualizer:
 
         # If we get here without crash, test passes
 
+    def test_layout_follows_resize(self, qtbot):
+        """Test dot positions are recomputed when the widget is resized."""
+        from whisper_dictate.visualizer import DotVisualizer
+
+        widget = DotVisualizer()
+        qtbot.addWidget(widget)
+        assert widget._x_centers == pytest.approx((19.2, 46.4, 73.6, 100.8))
+        assert widget._y_center == 20
+
+        widget.setFixedSize(200, 60)
+        widget.show()
+        qtbot.waitExposed(widget)
+
+        assert widget._x_centers[-1] == pytest.approx(164.8)
+        assert widget._y_center == 30
+
 
 class TestThemes:
     """Test theme definitions."""
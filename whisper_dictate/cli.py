@@ -17,13 +17,13 @@ from whisper_dictate.config import (
     save_config,
 )
 from whisper_dictate.transcriber import (
+    close_shared,
     download_model,
     get_available_models,
 )
 from whisper_dictate.utils import (
-    cleanup_pid,
-    is_already_running,
-    write_pid,
+    claim_instance,
+    read_command,
 )
 
 # Global reference for signal handlers
@@ -62,6 +62,13 @@ def create_parser() -> argparse.ArgumentParser:
         "-l", "--language", type=str, help="Language code for transcription"
     )
 
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Stay running and toggle recording on each invocation, "
+        "keeping the model loaded",
+    )
+
     # Model management
     model_group = parser.add_argument_group("model management")
     model_group.add_argument(
@@ -88,8 +95,6 @@ def create_parser() -> argparse.ArgumentParser:
 
 def main() -> None:
     """Main entry point."""
-    global window
-
     parser = create_parser()
     args = parser.parse_args()
 
@@ -151,36 +156,88 @@ def main() -> None:
     if args.language:
         config.general.language = args.language
 
-    # Check if already running - if so, signal it and exit
-    if is_already_running():
+    # Become the running instance - if another one holds it, it was told to stop
+    try:
+        server = claim_instance()
+    except RuntimeError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    if server is None:
         sys.exit(0)
 
-    # Write our PID
-    write_pid()
-
     # Import Qt here to avoid slow startup for non-GUI commands
+    from PyQt6.QtCore import QSocketNotifier, Qt, QTimer
     from PyQt6.QtWidgets import QApplication
 
-    from whisper_dictate.window import RecorderWindow
+    from whisper_dictate.window import RecorderWindow, shared_transcriber
 
     app = QApplication(sys.argv)
     app.setApplicationName("whisper-dictate")
     app.setDesktopFileName("whisper-dictate")
 
-    window = RecorderWindow(config)
-    window.setObjectName("whisper-dictate")
-    window.show()
+    def open_window() -> None:
+        global window
+        window = RecorderWindow(config)
+        window.setObjectName("whisper-dictate")
+        window.show()
+
+    if args.daemon:
+        # Windows come and go, the daemon runs until it is signalled
+        app.setQuitOnLastWindowClosed(False)
+        # Start loading the model before the first recording
+        shared_transcriber(config)
+
+        def open_daemon_window() -> None:
+            open_window()
+            assert window is not None
+            window.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+            window.destroyed.connect(forget_window)
+
+        def forget_window() -> None:
+            global window
+            window = None
+
+        # Python signal handlers only run when the interpreter gets control
+        wakeup = QTimer()
+        wakeup.timeout.connect(lambda: None)
+        wakeup.start(500)
+    else:
+        open_window()
+
+    # Handle commands from toggle invocations on the Qt event loop
+    notifier = QSocketNotifier(
+        server.fileno(), QSocketNotifier.Type.Read  # type: ignore[call-overload]
+    )
 
-    # Handle SIGUSR1 to stop recording (from toggle invocation)
-    def sigusr1_handler(sig, frame):
+    def on_command():
+        command = read_command(server)
+        if command != "stop":
+            return
         if window:
             window.stop_signal.emit()
+        elif args.daemon:
+            # Each invocation sends "stop"; with nothing recording, start
+            open_daemon_window()
+
+    notifier.activated.connect(on_command)
+
+    if not args.daemon:
+        # Let a new invocation start recording once this one has finished
+        def release_instance(_text: str) -> None:
+            notifier.setEnabled(False)
+            server.close()
 
-    signal.signal(signal.SIGUSR1, sigusr1_handler)
+        assert window is not None
+        window.transcription_done.connect(release_instance)
 
     # Handle SIGTERM/SIGINT for cleanup
     def sigterm_handler(sig, frame):
-        cleanup_pid()
+        if args.daemon:
+            # Exit once the current dictation, if any, has finished
+            if window is None:
+                app.quit()
+                return
+            window.destroyed.connect(app.quit)
         if window:
             window.stop_signal.emit()
 
@@ -188,7 +245,8 @@ def main() -> None:
     signal.signal(signal.SIGINT, sigterm_handler)
 
     ret = app.exec()
-    cleanup_pid()
+    server.close()
+    close_shared()
     sys.exit(ret)
 
 
@@ -6,17 +6,11 @@ with XDG Base Directory compliance.
 """
 
 import os
-from dataclasses import dataclass, field
+from dataclasses import asdict, dataclass, field, fields
+from functools import cache
 from pathlib import Path
 from typing import Optional
 
-try:
-    import tomllib
-except ImportError:
-    import tomli as tomllib  # type: ignore
-
-import tomli_w
-
 
 @dataclass
 class GeneralConfig:
@@ -37,6 +31,12 @@ class ModelConfig:
         if not self.path:
             self.path = str(get_models_dir())
 
+    @property
+    def file_path(self) -> Path:
+        """Model file path, adding the ggml- prefix and .bin suffix to bare names."""
+        name = self.name if self.name.endswith(".bin") else f"ggml-{self.name}.bin"
+        return Path(self.path) / name
+
 
 @dataclass
 class TranscriptionConfig:
@@ -66,6 +66,16 @@ class Config:
     ui: UIConfig = field(default_factory=UIConfig)
 
 
+# TOML section name -> dataclass holding that section's options
+_SECTION_MAP: dict[str, type] = {
+    "general": GeneralConfig,
+    "model": ModelConfig,
+    "transcription": TranscriptionConfig,
+    "ui": UIConfig,
+}
+
+
+@cache
 def get_config_dir() -> Path:
     """Get the configuration directory (XDG compliant)."""
     xdg_config = os.environ.get("XDG_CONFIG_HOME")
@@ -76,6 +86,7 @@ def get_config_dir() -> Path:
     return base / "whisper-dictate"
 
 
+@cache
 def get_data_dir() -> Path:
     """Get the data directory (XDG compliant)."""
     xdg_data = os.environ.get("XDG_DATA_HOME")
@@ -86,16 +97,47 @@ def get_data_dir() -> Path:
     return base / "whisper-dictate"
 
 
+@cache
 def get_models_dir() -> Path:
     """Get the models directory."""
     return get_data_dir() / "models"
 
 
+@cache
 def get_config_path() -> Path:
     """Get the default configuration file path."""
     return get_config_dir() / "config.toml"
 
 
+def _clear_path_cache() -> None:
+    """Forget cached paths so they are recomputed from the environment."""
+    get_config_dir.cache_clear()
+    get_data_dir.cache_clear()
+    get_models_dir.cache_clear()
+    get_config_path.cache_clear()
+
+
+def config_from_dict(data: dict) -> Config:
+    """
+    Build a configuration from parsed TOML data.
+
+    Args:
+        data: Parsed TOML document
+
+    Returns:
+        Config object with values from data, using defaults for missing keys.
+    """
+    config = Config()
+
+    for section, cls in _SECTION_MAP.items():
+        if section in data:
+            valid = {f.name for f in fields(cls)}
+            values = {k: v for k, v in data[section].items() if k in valid}
+            setattr(config, section, cls(**values))
+
+    return config
+
+
 def load_config(path: Optional[Path] = None) -> Config:
     """
     Load configuration from file.
@@ -109,51 +151,23 @@ def load_config(path: Optional[Path] = None) -> Config:
     if path is None:
         path = get_config_path()
 
-    config = Config()
-
     if path.exists():
+        # Only parse TOML when there is a file, so commands like --version
+        # don't pay for the import
+        try:
+            import tomllib
+        except ImportError:
+            import tomli as tomllib  # type: ignore
+
         try:
             with open(path, "rb") as f:
                 data = tomllib.load(f)
-
-            # Load general config
-            if "general" in data:
-                g = data["general"]
-                config.general = GeneralConfig(
-                    output_mode=g.get("output_mode", "clipboard"),
-                    language=g.get("language", "en"),
-                )
-
-            # Load model config
-            if "model" in data:
-                m = data["model"]
-                config.model = ModelConfig(
-                    name=m.get("name", "small.en"),
-                    path=m.get("path", ""),
-                )
-
-            # Load transcription config
-            if "transcription" in data:
-                t = data["transcription"]
-                config.transcription = TranscriptionConfig(
-                    whisper_cli=t.get("whisper_cli", ""),
-                    threads=t.get("threads", 4),
-                    timeout=t.get("timeout", 60),
-                )
-
-            # Load UI config
-            if "ui" in data:
-                u = data["ui"]
-                config.ui = UIConfig(
-                    position=u.get("position", "bottom"),
-                    edge_margin=u.get("edge_margin", 60),
-                    theme=u.get("theme", "google"),
-                )
+            return config_from_dict(data)
 
         except Exception as e:
             print(f"Warning: Could not load config from {path}: {e}")
 
-    return config
+    return Config()
 
 
 def save_config(config: Config, path: Optional[Path] = None) -> bool:
@@ -174,26 +188,10 @@ def save_config(config: Config, path: Optional[Path] = None) -> bool:
         # Ensure directory exists
         path.parent.mkdir(parents=True, exist_ok=True)
 
-        data = {
-            "general": {
-                "output_mode": config.general.output_mode,
-                "language": config.general.language,
-            },
-            "model": {
-                "name": config.model.name,
-                "path": config.model.path,
-            },
-            "transcription": {
-                "whisper_cli": config.transcription.whisper_cli,
-                "threads": config.transcription.threads,
-                "timeout": config.transcription.timeout,
-            },
-            "ui": {
-                "position": config.ui.position,
-                "edge_margin": config.ui.edge_margin,
-                "theme": config.ui.theme,
-            },
-        }
+        # Sections and keys mirror the dataclass fields
+        data = asdict(config)
+
+        import tomli_w
 
         with open(path, "wb") as f:
             tomli_w.dump(data, f)
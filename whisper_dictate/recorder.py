@@ -4,26 +4,78 @@ Audio recording module for whisper-dictate.
 Handles audio capture using PyAudio.
 """
 
-import tempfile
-import wave
+import math
+import os
+import struct
+import warnings
 from pathlib import Path
-from typing import Callable, List, Optional
+from typing import BinaryIO, Callable, Optional
 
-import numpy as np
-import pyaudio
+from whisper_dictate.config import get_data_dir
+
+try:
+    # Deprecated since Python 3.11, still the fastest way to get an RMS
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        import audioop
+except ImportError:  # Removed in Python 3.13
+    audioop = None  # type: ignore
 
 # Audio settings
 CHUNK = 1024
-FORMAT = pyaudio.paInt16
+LEVEL_STRIDE = 2  # Compute the visualizer level on every Nth chunk
+LEVEL_RING_SIZE = 64  # Recent levels kept for the GUI to poll
+FORMAT = "paInt16"  # pyaudio sample format, resolved once pyaudio is imported
 CHANNELS = 1
 RATE = 16000
 
+# Canonical 44-byte PCM WAV header: RIFF chunk, fmt subchunk, data subchunk
+_WAV_HEADER = struct.Struct("<4sI4s4sIHHIIHH4sI")
+
+
+def _wav_header(data_size: int, sample_width: int) -> bytes:
+    """Build a WAV header for data_size bytes of PCM audio."""
+    block_align = CHANNELS * sample_width
+    return _WAV_HEADER.pack(
+        b"RIFF",
+        36 + data_size,
+        b"WAVE",
+        b"fmt ",
+        16,
+        1,  # PCM
+        CHANNELS,
+        RATE,
+        RATE * block_align,
+        block_align,
+        sample_width * 8,
+        b"data",
+        data_size,
+    )
+
+
+def _sweep_stale_recordings(directory: Path) -> None:
+    """Remove recordings left behind by instances that are no longer running."""
+    for path in directory.glob("rec-*.wav"):
+        try:
+            pid = int(path.stem.removeprefix("rec-"))
+        except ValueError:
+            continue
+        if pid == os.getpid():
+            continue
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            path.unlink(missing_ok=True)
+        except PermissionError:
+            pass  # Alive, but owned by another user
+
 
 class AudioRecorder:
     """
     Audio recorder that captures microphone input.
 
-    Supports callback for real-time audio level monitoring.
+    Recent audio levels are kept in a ring buffer for the GUI to poll with
+    peek_level(); an optional callback also receives each level.
     """
 
     def __init__(self, level_callback: Optional[Callable[[float], None]] = None):
@@ -34,41 +86,84 @@ class AudioRecorder:
             level_callback: Optional callback function that receives audio level (0.0-1.0)
         """
         self.level_callback = level_callback
+        # Scales an int16 RMS amplitude to a 0.0-1.0 level
+        self._inv_scale = 1.0 / 32768.0
+        self._cb_counter = 0
         self.recording = False
-        self.audio_frames: List[bytes] = []
-        self.temp_file_path: Optional[str] = None
+        self._wf: Optional[BinaryIO] = None
+        self._sample_width = 2
+
+        # Import audio libraries here so CLI-only commands don't load PortAudio
+        import numpy as np
+        import pyaudio
+
+        self._np = np
+        self._pa = pyaudio
+        self._format = getattr(pyaudio, FORMAT)
+
+        # Written by the audio thread, read by the GUI thread via peek_level()
+        self._level_ring = np.zeros(LEVEL_RING_SIZE, dtype=np.float32)
+        self._level_idx = 0
 
         self.p = pyaudio.PyAudio()
         self.stream = None
 
+        # One PID-scoped file is reused for every recording in this process
+        recordings_dir = get_data_dir() / "tmp"
+        # Private to this user, like the NamedTemporaryFile it replaces
+        recordings_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+        _sweep_stale_recordings(recordings_dir)
+        self.temp_file_path = str(recordings_dir / f"rec-{os.getpid()}.wav")
+
     def _audio_callback(
         self, in_data: bytes, frame_count: int, time_info: dict, status: int
     ) -> tuple:
         """PyAudio callback for audio input."""
-        if self.recording:
-            self.audio_frames.append(in_data)
-
-            # Calculate audio level for visualization
+        # The stream only runs between start() and stop(), so there is no need
+        # to check self.recording; _wf is None only for a late in-flight chunk
+        wf = self._wf
+        if wf is not None:
+            # Append straight to the WAV file so memory use stays flat
+            wf.write(in_data)
+
+        # Calculate audio level for visualization (~15 Hz is plenty)
+        self._cb_counter += 1
+        if self._cb_counter % LEVEL_STRIDE == 1:
+            level = self._rms(in_data) * self._inv_scale
+            self._level_ring[self._level_idx % LEVEL_RING_SIZE] = level
+            self._level_idx += 1
             if self.level_callback:
-                audio_data = np.frombuffer(in_data, dtype=np.int16).astype(np.float32)
-                level = np.abs(audio_data).mean() / 32768.0
                 self.level_callback(level)
 
-        return (in_data, pyaudio.paContinue)
+        return (in_data, self._pa.paContinue)
+
+    def _rms(self, in_data: bytes) -> float:
+        """Root-mean-square amplitude of a chunk of int16 samples."""
+        if audioop is not None:
+            return float(audioop.rms(in_data, self._sample_width))
+        np = self._np
+        audio_data = np.frombuffer(in_data, dtype=np.int16).astype(np.float32)
+        if not audio_data.size:
+            return 0.0
+        return math.sqrt(float(np.dot(audio_data, audio_data)) / audio_data.size)
 
     def start(self) -> None:
         """Start recording audio."""
+        self._cb_counter = 0
+        self._level_ring.fill(0.0)
+        self._level_idx = 0
+
+        # Truncate the recording file; frames are written after a placeholder
+        # header that stop() fills in
+        self._sample_width = self.p.get_sample_size(self._format)
+        fd = os.open(self.temp_file_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        self._wf = os.fdopen(fd, "wb")
+        self._wf.write(_wav_header(0, self._sample_width))
         self.recording = True
-        self.audio_frames = []
-
-        # Create temp file for audio
-        temp_file = tempfile.NamedTemporaryFile(suffix=".wav", delete=False)
-        self.temp_file_path = temp_file.name
-        temp_file.close()
 
         # Open audio stream
         self.stream = self.p.open(
-            format=FORMAT,
+            format=self._format,
             channels=CHANNELS,
             rate=RATE,
             input=True,
@@ -78,7 +173,7 @@ class AudioRecorder:
 
     def stop(self) -> Optional[Path]:
         """
-        Stop recording and save audio to file.
+        Stop recording and finalize the audio file.
 
         Returns:
             Path to the recorded WAV file, or None if no audio was recorded.
@@ -94,26 +189,50 @@ class AudioRecorder:
             self.stream.close()
             self.stream = None
 
-        # Save audio to WAV file
-        if self.temp_file_path and self.audio_frames:
-            with wave.open(self.temp_file_path, "wb") as wf:
-                wf.setnchannels(CHANNELS)
-                wf.setsampwidth(self.p.get_sample_size(FORMAT))
-                wf.setframerate(RATE)
-                wf.writeframes(b"".join(self.audio_frames))
+        # Patch the header with the amount of audio written
+        wf, self._wf = self._wf, None
+        if wf:
+            data_size = wf.tell() - _WAV_HEADER.size
+            if data_size:
+                wf.seek(0)
+                wf.write(_wav_header(data_size, self._sample_width))
+            wf.close()
+            if self.temp_file_path and data_size:
+                return Path(self.temp_file_path)
+
+        self.cleanup_temp_file()
+        return None
 
-            return Path(self.temp_file_path)
+    def peek_level(self, window: int = 2) -> float:
+        """
+        Get the current audio level without blocking the audio thread.
 
-        return None
+        Args:
+            window: Number of most recent levels to consider
+
+        Returns:
+            Loudest of the last window levels (0.0-1.0), or 0.0 if none yet.
+        """
+        end = self._level_idx
+        count = min(window, end, LEVEL_RING_SIZE)
+        if count <= 0:
+            return 0.0
+        return float(
+            max(
+                self._level_ring[(end - i) % LEVEL_RING_SIZE]
+                for i in range(1, count + 1)
+            )
+        )
 
     def cleanup(self) -> None:
         """Clean up resources."""
         self.p.terminate()
+        self.cleanup_temp_file()
 
     def cleanup_temp_file(self) -> None:
-        """Remove the temporary audio file."""
+        """Remove the recording file."""
         if self.temp_file_path:
             try:
                 Path(self.temp_file_path).unlink(missing_ok=True)
-            except Exception:
+            except OSError:
                 pass
@@ -4,16 +4,93 @@ Transcription module for whisper-dictate.
 Handles speech-to-text transcription using whisper.cpp.
 """
 
+import hashlib
+import os
+import re
+import socket
 import subprocess
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Union
 
-from whisper_dictate.utils import detect_whisper_cli
+from whisper_dictate.utils import detect_whisper_cli, detect_whisper_server
+
+# Seconds between /health probes while whisper-server loads the model
+SERVER_POLL_INTERVAL = 0.05
+
+# Longest wait for whisper-server to load before falling back to whisper-cli
+SERVER_STARTUP_TIMEOUT = 10
+
+# Concurrent requests for transcribe_many(); the server queues them anyway
+SERVER_MAX_WORKERS = 4
+
+# Model downloads
+DOWNLOAD_WORKERS = 8  # Parallel range requests per file
+DOWNLOAD_PARALLEL_MIN = 16 * 1024 * 1024  # Smaller files use one request
+DOWNLOAD_CHUNK = 1024 * 1024  # Read/write size, amortizes syscalls on big models
+
+
+def _build_local_opener() -> urllib.request.OpenerDirector:
+    """Build an opener for whisper-server that never uses a proxy."""
+    # urllib would otherwise send loopback requests through any http_proxy
+    return urllib.request.build_opener(urllib.request.ProxyHandler({}))
+
+
+_LOCAL_OPENER = _build_local_opener()
+
+
+def _free_port() -> int:
+    """Ask the kernel for an unused local TCP port."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        port: int = sock.getsockname()[1]
+        return port
+
+
+def _encode_multipart(fields: dict, file_name: str, file_data: bytes) -> tuple:
+    """
+    Encode form fields and a WAV file as multipart/form-data.
+
+    Returns:
+        Tuple of (body, content type header).
+    """
+    boundary = uuid.uuid4().hex
+    parts = [
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="{name}"\r\n\r\n'
+        f"{value}\r\n".encode()
+        for name, value in fields.items()
+    ]
+    parts.append(
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="{file_name}"\r\n'
+        "Content-Type: audio/wav\r\n\r\n".encode()
+    )
+    parts.append(file_data)
+    parts.append(f"\r\n--{boundary}--\r\n".encode())
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+# Line breaks plus surrounding whitespace and blank lines, joined in one pass
+_LINE_JOIN_RE = re.compile(r"\s*\n\s*")
+
+
+def clean_output(text: str) -> str:
+    """Remove empty lines from whisper output and join the rest."""
+    return _LINE_JOIN_RE.sub(" ", text.strip())
 
 
 class Transcriber:
     """
     Speech-to-text transcriber using whisper.cpp.
+
+    When whisper-server is installed it is started once and kept running, so
+    the model is only loaded once. Otherwise whisper-cli is run per file.
     """
 
     whisper_cli: str  # Always set after __init__ (or raises)
@@ -25,6 +102,7 @@ class Transcriber:
         language: str = "en",
         threads: int = 4,
         timeout: int = 60,
+        use_server: bool = True,
     ):
         """
         Initialize the transcriber.
@@ -35,11 +113,15 @@ class Transcriber:
             language: Language code for transcription
             threads: Number of threads to use
             timeout: Transcription timeout in seconds
+            use_server: Start whisper-server if it is available
         """
         self.model_path = model_path
         self.language = language
         self.threads = threads
         self.timeout = timeout
+        self._server_proc: Optional[subprocess.Popen] = None
+        self._server_url = ""
+        self._server_ready = False
 
         detected_cli = whisper_cli or detect_whisper_cli()
         if not detected_cli:
@@ -49,42 +131,161 @@ class Transcriber:
             )
         self.whisper_cli = detected_cli
 
-    def transcribe(self, audio_file: Path) -> str:
-        """
-        Transcribe an audio file.
+        # Fixed part of every whisper-cli command line, built once
+        self._argv_prefix = [
+            self.whisper_cli,
+            "-m",
+            str(self.model_path),
+            "--no-timestamps",
+            "-t",
+            str(self.threads),
+            "--language",
+            self.language,
+        ]
 
-        Args:
-            audio_file: Path to the audio file (WAV format)
+        if use_server:
+            server = detect_whisper_server(self.whisper_cli)
+            if server:
+                self._start_server(server)
 
-        Returns:
-            Transcribed text, or empty string on failure.
-        """
+    def _start_server(self, server: str) -> None:
+        """Start whisper-server in the background; readiness is checked later."""
+        port = _free_port()
         try:
-            result = subprocess.run(
+            self._server_proc = subprocess.Popen(
                 [
-                    self.whisper_cli,
+                    server,
                     "-m",
                     str(self.model_path),
-                    "-f",
-                    str(audio_file),
-                    "--no-timestamps",
                     "-t",
                     str(self.threads),
-                    "--language",
+                    "-l",
                     self.language,
+                    "--host",
+                    "127.0.0.1",
+                    "--port",
+                    str(port),
                 ],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+        except OSError as e:
+            print(f"Could not start whisper-server, using whisper-cli: {e}")
+            return
+        self._server_url = f"http://127.0.0.1:{port}"
+
+    @property
+    def server_running(self) -> bool:
+        """Whether transcription goes through whisper-server."""
+        return self._server_proc is not None
+
+    def _wait_for_server(self) -> bool:
+        """
+        Wait for whisper-server to finish loading the model.
+
+        Returns:
+            True if the server is ready, False if whisper-cli should be used.
+        """
+        proc = self._server_proc
+        if proc is None:
+            return False
+
+        # Checked on every call, the server may die long after it was ready
+        if proc.poll() is not None:
+            print("whisper-server exited, using whisper-cli")
+            self._server_proc = None
+            self._server_ready = False
+            return False
+        if self._server_ready:
+            return True
+
+        # Give up early so a stuck server doesn't add a full timeout before
+        # the whisper-cli fallback even starts
+        budget = min(self.timeout, SERVER_STARTUP_TIMEOUT)
+        deadline = time.monotonic() + budget
+        while time.monotonic() < deadline:
+            if proc.poll() is not None:
+                print("whisper-server exited, using whisper-cli")
+                self._server_proc = None
+                return False
+            try:
+                with _LOCAL_OPENER.open(
+                    f"{self._server_url}/health", timeout=1
+                ) as response:
+                    if response.status == 200:
+                        self._server_ready = True
+                        return True
+            except (urllib.error.URLError, OSError):
+                pass  # Not listening yet, or still loading the model (503)
+            time.sleep(SERVER_POLL_INTERVAL)
+
+        print(f"whisper-server not ready after {budget}s, using whisper-cli")
+        self.close()
+        return False
+
+    def transcribe(self, audio: Union[bytes, Path]) -> str:
+        """
+        Transcribe audio.
+
+        Args:
+            audio: Path to a WAV file, or the WAV file contents
+
+        Returns:
+            Transcribed text, or empty string on failure.
+        """
+        if self._wait_for_server():
+            return self._transcribe_server(audio)
+        return self._transcribe_cli(audio)
+
+    def _transcribe_server(self, audio: Union[bytes, Path]) -> str:
+        """Transcribe by posting the audio to the running whisper-server."""
+        try:
+            if isinstance(audio, bytes):
+                file_name, file_data = "audio.wav", audio
+            else:
+                file_name, file_data = audio.name, audio.read_bytes()
+            body, content_type = _encode_multipart(
+                {"temperature": "0.0", "response_format": "text"},
+                file_name,
+                file_data,
+            )
+            request = urllib.request.Request(
+                f"{self._server_url}/inference",
+                data=body,
+                headers={"Content-Type": content_type},
+            )
+            with _LOCAL_OPENER.open(request, timeout=self.timeout) as response:
+                return clean_output(response.read().decode())
+
+        except TimeoutError:
+            print(f"Transcription timed out after {self.timeout}s")
+            return ""
+        except urllib.error.HTTPError as e:
+            # The server is up but rejected this request
+            print(f"Transcription error: {e}")
+            return ""
+        except (urllib.error.URLError, ConnectionError) as e:
+            print(f"Lost whisper-server ({e}), using whisper-cli")
+            self.close()
+            return self._transcribe_cli(audio)
+        except Exception as e:
+            print(f"Transcription error: {e}")
+            return ""
+
+    def _transcribe_cli(self, audio: Union[bytes, Path]) -> str:
+        """Transcribe by running whisper-cli on the audio."""
+        # In-memory audio is piped to whisper-cli's stdin instead of a file
+        stdin_data = audio if isinstance(audio, bytes) else None
+        try:
+            result = subprocess.run(
+                self._cli_command("-f", "-" if stdin_data is not None else str(audio)),
+                input=stdin_data,
                 capture_output=True,
-                text=True,
                 timeout=self.timeout,
             )
 
             # Clean output - remove empty lines and join
-            lines = [
-                line.strip()
-                for line in result.stdout.strip().split("\n")
-                if line.strip()
-            ]
-            return " ".join(lines)
+            return clean_output(result.stdout.decode(errors="replace"))
 
         except subprocess.TimeoutExpired:
             print(f"Transcription timed out after {self.timeout}s")
@@ -93,6 +294,129 @@ class Transcriber:
             print(f"Transcription error: {e}")
             return ""
 
+    def transcribe_many(self, audio_files: list[Path]) -> list[str]:
+        """
+        Transcribe several audio files with a single model load.
+
+        Args:
+            audio_files: Paths to audio files (WAV format)
+
+        Returns:
+            Transcribed text for each file, in order ("" for failures).
+        """
+        if not audio_files:
+            return []
+
+        if self._wait_for_server():
+            workers = min(SERVER_MAX_WORKERS, len(audio_files))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                return list(pool.map(self._transcribe_server, audio_files))
+
+        # whisper-cli accepts several -f options; --output-txt writes each
+        # transcript next to its input as <file>.txt
+        inputs: list[str] = []
+        for audio_file in audio_files:
+            inputs += ["-f", str(audio_file)]
+        try:
+            subprocess.run(
+                self._cli_command("--output-txt", *inputs),
+                capture_output=True,
+                timeout=self.timeout * len(audio_files),
+            )
+        except subprocess.TimeoutExpired:
+            print(f"Transcription timed out after {self.timeout * len(audio_files)}s")
+        except Exception as e:
+            print(f"Transcription error: {e}")
+
+        results = []
+        for audio_file in audio_files:
+            txt_file = Path(f"{audio_file}.txt")
+            try:
+                results.append(clean_output(txt_file.read_text(errors="replace")))
+            except OSError:
+                results.append("")
+            txt_file.unlink(missing_ok=True)
+        return results
+
+    def cli_command(self, audio_file: Path) -> list[str]:
+        """
+        Build the whisper-cli command line that transcribes a file.
+
+        The output can be passed to clean_output() to get the text.
+        """
+        return self._cli_command("-f", str(audio_file))
+
+    def _cli_command(self, *args: str) -> list[str]:
+        """Build a whisper-cli command line with the configured options."""
+        return [*self._argv_prefix, *args]
+
+    def close(self) -> None:
+        """Stop whisper-server if it is running."""
+        proc, self._server_proc = self._server_proc, None
+        self._server_ready = False
+        if proc is None:
+            return
+        proc.terminate()
+        try:
+            proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+# Shared instance so a long-running process keeps one warm pipeline
+_TRANSCRIBER: Optional[Transcriber] = None
+
+
+def get_or_create(
+    model_path: Path,
+    whisper_cli: Optional[str] = None,
+    language: str = "en",
+    threads: int = 4,
+    timeout: int = 60,
+) -> Transcriber:
+    """
+    Get the shared Transcriber, creating it on first use.
+
+    The existing instance is replaced if it was created with different
+    settings. Arguments are the same as for Transcriber.
+    """
+    global _TRANSCRIBER
+    current = _TRANSCRIBER
+    if (
+        current is not None
+        and current.model_path == model_path
+        and (whisper_cli is None or current.whisper_cli == whisper_cli)
+        and current.language == language
+        and current.threads == threads
+        and current.timeout == timeout
+    ):
+        return current
+
+    close_shared()
+    _TRANSCRIBER = Transcriber(
+        model_path=model_path,
+        whisper_cli=whisper_cli,
+        language=language,
+        threads=threads,
+        timeout=timeout,
+    )
+    return _TRANSCRIBER
+
+
+def close_shared() -> None:
+    """Stop the shared Transcriber's whisper-server, if any."""
+    global _TRANSCRIBER
+    if _TRANSCRIBER is not None:
+        _TRANSCRIBER.close()
+        _TRANSCRIBER = None
+
 
 def get_available_models(models_dir: Path) -> list:
     """
@@ -110,10 +434,107 @@ def get_available_models(models_dir: Path) -> list:
     return [f.name for f in models_dir.glob("ggml-*.bin")]
 
 
+class _LinkedHeaders(urllib.request.HTTPRedirectHandler):
+    """Keep Hugging Face's file metadata headers from redirect responses."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.headers: dict[str, str] = {}
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        for name in ("X-Linked-Etag", "X-Linked-Size"):
+            if headers.get(name):
+                self.headers[name] = headers[name]
+        new_req = super().redirect_request(req, fp, code, msg, headers, newurl)
+        # Before Python 3.12 redirects always become GET, which would start
+        # downloading the whole model from the HEAD probe
+        if new_req is not None:
+            new_req.method = req.get_method()
+        return new_req
+
+
+def _probe_download(url: str) -> tuple[str, Optional[int], Optional[str], bool]:
+    """
+    Look up a download's size and checksum with a HEAD request.
+
+    Returns:
+        Tuple of (final URL after redirects, size in bytes or None,
+        expected sha256 or None, whether byte ranges are supported).
+    """
+    linked = _LinkedHeaders()
+    opener = urllib.request.build_opener(linked)
+    with opener.open(urllib.request.Request(url, method="HEAD")) as response:
+        final_url = response.geturl()
+        length = response.headers.get("Content-Length")
+        ranges = response.headers.get("Accept-Ranges", "") == "bytes"
+
+    # LFS files carry their sha256 as the etag on the redirect
+    etag = linked.headers.get("X-Linked-Etag", "").strip('"')
+    sha256 = etag if re.fullmatch(r"[0-9a-f]{64}", etag) else None
+    return final_url, int(length) if length else None, sha256, ranges
+
+
+class _RangeNotSupported(Exception):
+    """The server ignored a Range header and sent the whole file."""
+
+
+def _download_ranges(url: str, output_path: Path, size: int) -> None:
+    """Download url into output_path with parallel byte-range requests."""
+    part = -(-size // DOWNLOAD_WORKERS)
+    ranges = [(lo, min(lo + part, size) - 1) for lo in range(0, size, part)]
+
+    stop = threading.Event()
+    fd = os.open(output_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        try:
+            os.posix_fallocate(fd, 0, size)
+        except (AttributeError, OSError):
+            pass  # Not available on this platform or filesystem
+
+        def fetch(byte_range: tuple[int, int]) -> None:
+            lo, hi = byte_range
+            request = urllib.request.Request(url, headers={"Range": f"bytes={lo}-{hi}"})
+            with urllib.request.urlopen(request) as response:
+                if response.status != 206:
+                    raise _RangeNotSupported()
+                offset = lo
+                while chunk := response.read(DOWNLOAD_CHUNK):
+                    if stop.is_set():
+                        return
+                    os.pwrite(fd, chunk, offset)
+                    offset += len(chunk)
+            if offset != hi + 1:
+                raise OSError(f"Incomplete download of bytes {lo}-{hi}")
+
+        pool = ThreadPoolExecutor(max_workers=len(ranges))
+        try:
+            list(pool.map(fetch, ranges))
+        except BaseException:
+            # On Ctrl-C or a failed range, stop the other workers early
+            stop.set()
+            pool.shutdown(cancel_futures=True)
+            raise
+        pool.shutdown()
+    finally:
+        os.close(fd)
+
+
+def _sha256_file(path: Path) -> str:
+    """Compute the sha256 hex digest of a file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(DOWNLOAD_CHUNK):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
 def download_model(model_name: str, models_dir: Path) -> bool:
     """
     Download a whisper model from Hugging Face.
 
+    Large files are fetched with parallel range requests when the server
+    supports them, and checked against the published sha256.
+
     Args:
         model_name: Model name (e.g., "small.en", "base.en", "medium")
         models_dir: Directory to save the model
@@ -140,20 +561,42 @@ def download_model(model_name: str, models_dir: Path) -> bool:
 
     print(f"Downloading {model_name}...")
 
+    # Only a verified download is moved into place under the model name
+    part_path = output_path.with_suffix(".part")
+
     try:
         import shutil
-        import urllib.request
 
-        with urllib.request.urlopen(url) as response:
-            with open(output_path, "wb") as out_file:
-                shutil.copyfileobj(response, out_file)
+        try:
+            final_url, size, sha256, ranges = _probe_download(url)
+        except Exception:
+            # The probe is only an optimisation, a plain GET still works
+            final_url, size, sha256, ranges = url, None, None, False
+
+        downloaded = False
+        if ranges and size and size >= DOWNLOAD_PARALLEL_MIN:
+            try:
+                _download_ranges(final_url, part_path, size)
+                downloaded = True
+            except _RangeNotSupported:
+                pass
+
+        if not downloaded:
+            with urllib.request.urlopen(final_url) as response:
+                with open(part_path, "wb") as out_file:
+                    shutil.copyfileobj(response, out_file, DOWNLOAD_CHUNK)
 
+        if sha256 and _sha256_file(part_path) != sha256:
+            raise ValueError("Checksum mismatch, the download is corrupt")
+
+        os.replace(part_path, output_path)
         print(f"Downloaded to: {output_path}")
         return True
 
     except Exception as e:
         print(f"Failed to download model: {e}")
-        # Clean up partial download
-        if output_path.exists():
-            output_path.unlink()
         return False
+
+    finally:
+        # Clean up a partial download, including after Ctrl-C
+        part_path.unlink(missing_ok=True)
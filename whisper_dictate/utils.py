@@ -1,86 +1,233 @@
 """
 Utility functions for whisper-dictate.
 
-Handles PID file management, clipboard operations, and typing utilities.
+Handles single-instance IPC, clipboard operations, and typing utilities.
 """
 
+import errno
 import os
-import shutil
-import signal
+import socket
+import struct
 import subprocess
+from functools import cache
 from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, Optional
 
-# Default paths
-PID_FILE = Path("/tmp/whisper-dictate.pid")
+# External tools looked up on $PATH
+_PATH_TOOLS = frozenset(
+    {
+        "wl-copy",
+        "xclip",
+        "pbcopy",
+        "wtype",
+        "dotool",
+        "ydotool",
+        "xdotool",
+        "whisper-cli",
+        "whisper",
+        "main",
+        "whisper-server",
+    }
+)
 
 
-def is_already_running() -> bool:
+def _socket_address() -> str:
+    """Abstract-namespace socket address for this user's running instance."""
+    return f"\0whisper-dictate-{os.getuid()}"
+
+
+# struct ucred returned by SO_PEERCRED: pid, uid, gid
+_PEERCRED = struct.Struct("3i")
+
+
+def _peer_uid(sock: socket.socket) -> int:
+    """User ID of the process at the other end of a connected Unix socket."""
+    creds = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, _PEERCRED.size)
+    return int(_PEERCRED.unpack(creds)[1])
+
+
+def send_command(command: str) -> bool:
     """
-    Check if another instance is running and signal it to stop.
+    Send a one-line command to the running instance.
+
+    Args:
+        command: Command to send, e.g. "stop"
 
     Returns:
-        True if another instance was running (and signaled), False otherwise.
+        True if an instance was listening and received it, False otherwise.
+
+    Raises:
+        RuntimeError: If the address is held by another user's process.
     """
-    if PID_FILE.exists():
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
         try:
-            pid = int(PID_FILE.read_text().strip())
-            # Check if process exists
-            os.kill(pid, 0)
-            # Process exists, send SIGUSR1 to stop recording
-            os.kill(pid, signal.SIGUSR1)
-            return True
-        except (ProcessLookupError, ValueError):
-            # Process doesn't exist, clean up stale pid file
-            PID_FILE.unlink(missing_ok=True)
-    return False
+            client.connect(_socket_address())
+        except (ConnectionRefusedError, FileNotFoundError):
+            return False
+        # Abstract sockets have no file permissions, so check who owns it
+        if _peer_uid(client) != os.getuid():
+            raise RuntimeError(
+                "The whisper-dictate socket is held by another user's process"
+            )
+        try:
+            client.sendall(f"{command}\n".encode())
+        except OSError:
+            return False
+    return True
+
+
+def claim_instance() -> Optional[socket.socket]:
+    """
+    Become the running instance, or tell the running one to stop.
+
+    Binding the socket is the lock: the kernel releases the address as soon
+    as the owning process exits, so there is no stale state to clean up.
+
+    Returns:
+        Listening socket if this process is now the running instance,
+        None if another instance was told to stop.
+
+    Raises:
+        RuntimeError: If the instance could neither be claimed nor reached.
+    """
+    for _ in range(2):
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            server.bind(_socket_address())
+        except OSError as e:
+            server.close()
+            if e.errno != errno.EADDRINUSE:
+                raise
+            if send_command("stop"):
+                return None
+            # The owner exited between bind and connect, try to claim again
+            continue
+        server.listen(1)
+        return server
+    raise RuntimeError("Could not claim or reach the running whisper-dictate")
+
+
+def read_command(server: socket.socket) -> Optional[str]:
+    """
+    Accept one pending connection and read its command.
+
+    Args:
+        server: Listening socket returned by claim_instance()
 
+    Returns:
+        The command without its trailing newline, or None if nothing was read.
+    """
+    try:
+        conn, _ = server.accept()
+    except OSError:
+        return None
+    with conn:
+        # Anyone can connect to an abstract socket, only obey this user
+        if _peer_uid(conn) != os.getuid():
+            return None
+        conn.settimeout(1.0)
+        try:
+            data = conn.recv(1024)
+        except OSError:
+            return None
+    return data.decode(errors="replace").strip() or None
 
-def write_pid() -> None:
-    """Write current PID to file."""
-    PID_FILE.write_text(str(os.getpid()))
 
+def _reset_detection_cache() -> None:
+    """Forget cached tool and display server detection results."""
+    _scan_path_tools.cache_clear()
+    detect_clipboard_tool.cache_clear()
+    detect_typing_tools.cache_clear()
+    detect_whisper_cli.cache_clear()
+    detect_whisper_server.cache_clear()
+    detect_display_server.cache_clear()
 
-def cleanup_pid() -> None:
-    """Remove PID file."""
-    PID_FILE.unlink(missing_ok=True)
 
+@cache
+def _scan_path_tools() -> dict[str, str]:
+    """
+    Find all known external tools with a single pass over $PATH.
 
+    Returns:
+        Mapping of tool name to full path, preferring earlier PATH entries.
+    """
+    found: dict[str, str] = {}
+    for directory in os.environ.get("PATH", os.defpath).split(os.pathsep):
+        if not directory:
+            continue
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if (
+                        entry.name in _PATH_TOOLS
+                        and entry.name not in found
+                        and entry.is_file()
+                        and os.access(entry.path, os.X_OK)
+                    ):
+                        found[entry.name] = entry.path
+        except OSError:
+            continue
+    return found
+
+
+@cache
 def detect_clipboard_tool() -> Optional[str]:
     """
     Detect available clipboard tool.
 
     Returns:
-        Command name for clipboard tool, or None if not found.
+        Full path to the clipboard tool, or None if not found.
     """
+    tools = _scan_path_tools()
     # Wayland
-    if shutil.which("wl-copy"):
-        return "wl-copy"
+    if "wl-copy" in tools:
+        return tools["wl-copy"]
     # X11
-    if shutil.which("xclip"):
-        return "xclip"
+    if "xclip" in tools:
+        return tools["xclip"]
     # macOS
-    if shutil.which("pbcopy"):
-        return "pbcopy"
+    if "pbcopy" in tools:
+        return tools["pbcopy"]
     return None
 
 
-def detect_typing_tool() -> Optional[str]:
+@cache
+def detect_typing_tools() -> tuple[str, ...]:
     """
-    Detect available typing tool.
+    Detect available typing tools.
 
     Returns:
-        Command name for typing tool, or None if not found.
+        Full paths to the typing tools, most preferred first.
     """
+    tools = _scan_path_tools()
+    found = []
+    # Wayland, no per-key delay but only works on wlroots compositors
+    if "wtype" in tools and detect_display_server() == "wayland":
+        found.append(tools["wtype"])
+    # uinput, works on any display server
+    if "dotool" in tools:
+        found.append(tools["dotool"])
     # Wayland (requires ydotool daemon)
-    if shutil.which("ydotool"):
-        return "ydotool"
+    if "ydotool" in tools:
+        found.append(tools["ydotool"])
     # X11
-    if shutil.which("xdotool"):
-        return "xdotool"
-    return None
+    if "xdotool" in tools:
+        found.append(tools["xdotool"])
+    return tuple(found)
+
+
+def detect_typing_tool() -> Optional[str]:
+    """
+    Detect available typing tool.
+
+    Returns:
+        Full path to the typing tool, or None if not found.
+    """
+    tools = detect_typing_tools()
+    return tools[0] if tools else None
 
 
+@cache
 def detect_whisper_cli() -> Optional[str]:
     """
     Detect available whisper CLI tool.
@@ -94,25 +241,50 @@ def detect_whisper_cli() -> Optional[str]:
         "main",  # compiled whisper.cpp binary
     ]
 
+    tools = _scan_path_tools()
     for cmd in candidates:
-        path = shutil.which(cmd)
-        if path:
-            return path
-
-    # Check common installation paths
-    common_paths: list[Path] = [
-        Path("/usr/bin/whisper-cli"),
-        Path("/usr/local/bin/whisper-cli"),
-        Path.home() / ".local/bin/whisper-cli",
+        if cmd in tools:
+            return tools[cmd]
+
+    # Check common installation directories with one listing each
+    common_dirs: list[Path] = [
+        Path("/usr/bin"),
+        Path("/usr/local/bin"),
+        Path.home() / ".local/bin",
     ]
 
-    for path_obj in common_paths:
-        if path_obj.exists():
-            return str(path_obj)
+    for directory in common_dirs:
+        try:
+            entries = os.listdir(directory)
+        except OSError:
+            continue
+        if "whisper-cli" in entries:
+            return str(directory / "whisper-cli")
 
     return None
 
 
+@cache
+def detect_whisper_server(whisper_cli: str) -> Optional[str]:
+    """
+    Detect the whisper.cpp server matching a whisper CLI.
+
+    Args:
+        whisper_cli: Path to the whisper CLI in use
+
+    Returns:
+        Path to whisper-server, or None if not found.
+    """
+    # Prefer the server installed alongside the CLI so both share a build
+    cli_path = Path(whisper_cli)
+    if cli_path.is_absolute():
+        sibling = cli_path.with_name("whisper-server")
+        if os.access(sibling, os.X_OK):
+            return str(sibling)
+    return _scan_path_tools().get("whisper-server")
+
+
+@cache
 def detect_display_server() -> str:
     """
     Detect the current display server.
@@ -129,13 +301,28 @@ def detect_display_server() -> str:
     return "unknown"
 
 
+# Clipboard backends by tool name, called with the tool's full path and the
+# text. Text goes over stdin so it is never exposed in /proc/*/cmdline
+_CLIPBOARD_BACKENDS: dict[str, Callable[[str, str], Any]] = {
+    "wl-copy": lambda tool, text: subprocess.run(
+        [tool], input=text.encode(), check=True
+    ),
+    "xclip": lambda tool, text: subprocess.run(
+        [tool, "-selection", "clipboard"], input=text.encode(), check=True
+    ),
+    "pbcopy": lambda tool, text: subprocess.run(
+        [tool], input=text.encode(), check=True
+    ),
+}
+
+
 def copy_to_clipboard(text: str, tool: Optional[str] = None) -> bool:
     """
     Copy text to clipboard.
 
     Args:
         text: Text to copy
-        tool: Clipboard tool to use (auto-detect if None)
+        tool: Clipboard tool name or path to use (auto-detect if None)
 
     Returns:
         True if successful, False otherwise.
@@ -146,48 +333,127 @@ def copy_to_clipboard(text: str, tool: Optional[str] = None) -> bool:
     if not tool:
         return False
 
+    backend = _CLIPBOARD_BACKENDS.get(os.path.basename(tool))
+    if backend is None:
+        return False
     try:
-        if tool == "wl-copy":
-            subprocess.run(["wl-copy", text], check=True)
-        elif tool == "xclip":
-            subprocess.run(
-                ["xclip", "-selection", "clipboard"], input=text.encode(), check=True
-            )
-        elif tool == "pbcopy":
-            subprocess.run(["pbcopy"], input=text.encode(), check=True)
-        else:
-            return False
+        # Run the resolved path directly so exec doesn't search $PATH again
+        backend(tool, text)
         return True
     except subprocess.CalledProcessError:
         return False
 
 
-def type_text(text: str, tool: Optional[str] = None) -> bool:
+# Characters whose X keysym is not their code point
+_XTEST_SPECIAL_KEYSYMS = {"\n": 0xFF0D, "\t": 0xFF09}  # Return, Tab
+
+
+def _xtest_type(text: str) -> bool:
     """
-    Type text using typing tool.
+    Type text in-process through the X11 XTEST extension.
 
-    Args:
-        text: Text to type
-        tool: Typing tool to use (auto-detect if None)
+    Needs the optional python-xlib package. Nothing is typed unless every
+    character maps to a key on the current keyboard layout.
 
     Returns:
-        True if successful, False otherwise.
+        True if the text was typed, False to fall back to a typing tool.
     """
-    if not tool:
-        tool = detect_typing_tool()
+    try:
+        from Xlib import XK, X, display
+        from Xlib.ext import xtest
+    except ImportError:
+        return False
 
-    if not tool:
+    try:
+        conn = display.Display()
+    except Exception:
         return False
 
     try:
-        if tool == "ydotool":
-            subprocess.run(
-                ["ydotool", "type", "--file", "-"], input=text, text=True, check=True
+        shift = conn.keysym_to_keycode(XK.XK_Shift_L)
+        strokes = []
+        for char in text:
+            code = ord(char)
+            keysym = _XTEST_SPECIAL_KEYSYMS.get(
+                char, code if code < 0x100 else 0x01000000 | code
             )
-        elif tool == "xdotool":
-            subprocess.run(["xdotool", "type", "--", text], check=True)
-        else:
-            return False
+            # Index 0 of a keycode's mapping is unshifted, 1 is shifted
+            for keycode, index in conn.keysym_to_keycodes(keysym):
+                if index in (0, 1):
+                    strokes.append((keycode, index == 1))
+                    break
+            else:
+                return False
+
+        for keycode, shifted in strokes:
+            if shifted:
+                xtest.fake_input(conn, X.KeyPress, shift)
+            xtest.fake_input(conn, X.KeyPress, keycode)
+            xtest.fake_input(conn, X.KeyRelease, keycode)
+            if shifted:
+                xtest.fake_input(conn, X.KeyRelease, shift)
+        conn.sync()
         return True
-    except subprocess.CalledProcessError:
+    except Exception:
         return False
+    finally:
+        conn.close()
+
+
+def _dotool_script(text: str) -> str:
+    """Build dotool commands that type text, pressing Enter for line breaks."""
+    # A raw newline would end the type command and run the rest as a command
+    return "key enter\n".join(
+        f"type {line}\n" if line else "" for line in text.split("\n")
+    )
+
+
+# Typing backends by tool name, called like the clipboard backends
+_TYPING_BACKENDS: dict[str, Callable[[str, str], Any]] = {
+    "wtype": lambda tool, text: subprocess.run([tool, "--", text], check=True),
+    "dotool": lambda tool, text: subprocess.run(
+        [tool], input=_dotool_script(text), text=True, check=True
+    ),
+    # ydotool sleeps between keys by default, which is very slow
+    "ydotool": lambda tool, text: subprocess.run(
+        [tool, "type", "--key-delay", "0", "--file", "-"],
+        input=text,
+        text=True,
+        check=True,
+    ),
+    "xdotool": lambda tool, text: subprocess.run(
+        [tool, "type", "--", text], check=True
+    ),
+}
+
+
+def type_text(text: str, tool: Optional[str] = None) -> bool:
+    """
+    Type text using typing tool.
+
+    Args:
+        text: Text to type
+        tool: Typing tool name or path to use (auto-detect if None)
+
+    Returns:
+        True if successful, False otherwise.
+    """
+    if tool:
+        tools: tuple[str, ...] = (tool,)
+    else:
+        # On X11, type without spawning a process when python-xlib is present
+        if detect_display_server() == "x11" and _xtest_type(text):
+            return True
+        tools = detect_typing_tools()
+
+    for candidate in tools:
+        backend = _TYPING_BACKENDS.get(os.path.basename(candidate))
+        if backend is None:
+            continue
+        try:
+            backend(candidate, text)
+            return True
+        except (subprocess.CalledProcessError, FileNotFoundError):
+            # e.g. wtype on a compositor without the virtual keyboard protocol
+            continue
+    return False
@@ -4,11 +4,12 @@ Google Assistant-style animated dot visualizer.
 Displays animated dots that respond to audio input levels.
 """
 
-import math
-from typing import List
+import time
+from typing import Callable, Optional
 
-from PyQt6.QtCore import Qt, QTimer
-from PyQt6.QtGui import QBrush, QColor, QPainter, QRadialGradient
+import numpy as np
+from PyQt6.QtCore import QRect, QRectF, Qt, QTimer
+from PyQt6.QtGui import QBrush, QColor, QPainter, QPixmap, QRadialGradient, QRegion
 from PyQt6.QtWidgets import QWidget
 
 # Color themes
@@ -40,29 +41,88 @@ THEMES = {
 }
 
 NUM_DOTS = 4
+DOT_PHASE_OFFSETS = np.arange(NUM_DOTS) * 0.8  # Wave phase offset per dot
+SPRITE_SIZE = 32  # Pre-rendered dot size in pixels, scaled down when drawn
+DOT_RADIUS = 8
+REPAINT_THRESHOLD = 0.01  # Height change (well under a pixel) worth repainting
+
+# Animation timer intervals (ms)
+ACTIVE_INTERVAL = 30  # ~33fps while there is audio
+IDLE_INTERVAL = 200  # 5fps during silence
+PROCESSING_INTERVAL = 500  # No audio to follow while transcribing
+
+# Animation speed, defined per active frame and scaled by the real frame time
+FRAME_TIME = ACTIVE_INTERVAL / 1000
+PHASE_STEP = 0.15  # Wave phase advance per frame
+SMOOTHING = 0.3  # Fraction of the way to the target covered per frame
+MAX_FRAME_GAP = 1.0  # Seconds; longer gaps (timer stopped) don't fast-forward
+
+IDLE_LEVEL = 0.02  # Levels below this count as silence
+IDLE_DELAY = 0.3  # Seconds of silence before slowing down
+
+
+def _render_dot(color: QColor) -> QPixmap:
+    """Render one shaded dot into a transparent pixmap."""
+    pixmap = QPixmap(SPRITE_SIZE, SPRITE_SIZE)
+    pixmap.fill(Qt.GlobalColor.transparent)
+
+    r = SPRITE_SIZE / 2
+    painter = QPainter(pixmap)
+    painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+
+    # Gradient for 3D effect, lit from the top left
+    gradient = QRadialGradient(r - r * 0.3, r - r * 0.3, r * 1.5)
+    gradient.setColorAt(0, color.lighter(130))
+    gradient.setColorAt(0.5, color)
+    gradient.setColorAt(1, color.darker(120))
+
+    painter.setBrush(QBrush(gradient))
+    painter.setPen(Qt.PenStyle.NoPen)
+    painter.drawEllipse(QRectF(0, 0, SPRITE_SIZE, SPRITE_SIZE))
+    painter.end()
+    return pixmap
 
 
 class DotVisualizer(QWidget):
     """Google Assistant-style animated dots that respond to audio."""
 
-    def __init__(self, theme: str = "google"):
+    def __init__(
+        self,
+        theme: str = "google",
+        level_source: Optional[Callable[[], float]] = None,
+    ):
+        """
+        Initialize the visualizer.
+
+        Args:
+            theme: Name of the color theme
+            level_source: Optional callable polled for the audio level each frame
+        """
         super().__init__()
-        self.dot_heights: List[float] = [0.3] * NUM_DOTS
-        self.target_heights: List[float] = [0.3] * NUM_DOTS
+        self.level_source = level_source
+        self.dot_heights = np.full(NUM_DOTS, 0.3)
+        self.target_heights = np.full(NUM_DOTS, 0.3)
+        self._painted_heights = self.dot_heights.copy()
         self.phase: float = 0
         self.audio_level: float = 0
         self.colors = THEMES.get(theme, THEMES["google"])
+        self._dot_pixmaps = [_render_dot(color) for color in self.colors]
+        self._last_active = time.monotonic()
+        self._last_frame = self._last_active
 
         self.setFixedSize(120, 40)
+        self._update_layout()
 
-        # Animation timer
-        self.anim_timer = QTimer()
+        # Animation timer, slowed down while there is nothing to show
+        self.anim_timer = QTimer(self)
         self.anim_timer.timeout.connect(self.animate)
-        self.anim_timer.start(30)  # ~33fps
+        self.anim_timer.start(ACTIVE_INTERVAL)
 
     def set_theme(self, theme: str) -> None:
         """Set the color theme."""
         self.colors = THEMES.get(theme, THEMES["google"])
+        self._dot_pixmaps = [_render_dot(color) for color in self.colors]
+        self.update()
 
     def set_audio_level(self, level: float) -> None:
         """
@@ -72,57 +132,98 @@ class DotVisualizer(QWidget):
             level: Audio level from 0.0 to 1.0
         """
         self.audio_level = min(1.0, level * 2)  # Amplify for visibility
+        if self.audio_level >= IDLE_LEVEL:
+            self._last_active = time.monotonic()
+            if self.anim_timer.interval() != ACTIVE_INTERVAL:
+                self.anim_timer.setInterval(ACTIVE_INTERVAL)
+
+    def set_processing(self) -> None:
+        """Stop following audio input and animate slowly."""
+        self.level_source = None
+        self.audio_level = 0
+        self.anim_timer.setInterval(PROCESSING_INTERVAL)
 
     def animate(self) -> None:
         """Update animation state."""
-        self.phase += 0.15
-
-        # Calculate target heights based on audio level and phase
-        for i in range(NUM_DOTS):
-            # Create wave effect with phase offset per dot
-            wave = math.sin(self.phase + i * 0.8) * 0.5 + 0.5
-            # Combine with audio level
-            self.target_heights[i] = 0.2 + (wave * self.audio_level * 0.8)
-
-        # Smooth interpolation
-        for i in range(NUM_DOTS):
-            self.dot_heights[i] += (self.target_heights[i] - self.dot_heights[i]) * 0.3
+        if self.level_source is not None:
+            self.set_audio_level(self.level_source())
+            if (
+                self.audio_level < IDLE_LEVEL
+                and self.anim_timer.interval() == ACTIVE_INTERVAL
+                and time.monotonic() - self._last_active > IDLE_DELAY
+            ):
+                self.anim_timer.setInterval(IDLE_INTERVAL)
+
+        # Advance by the time actually elapsed, so late or slowed-down
+        # timer ticks keep the same animation speed
+        now = time.monotonic()
+        frames = min(now - self._last_frame, MAX_FRAME_GAP) / FRAME_TIME
+        self._last_frame = now
+        self.phase += PHASE_STEP * frames
+
+        # Calculate target heights for all dots at once:
+        # 0.2 + (sin(phase + offset) * 0.5 + 0.5) * audio_level * 0.8
+        amplitude = self.audio_level * 0.8 * 0.5
+        np.sin(self.phase + DOT_PHASE_OFFSETS, out=self.target_heights)
+        self.target_heights *= amplitude
+        self.target_heights += 0.2 + amplitude
+
+        # Smooth interpolation, compounded over the elapsed frames
+        alpha = 1 - (1 - SMOOTHING) ** frames
+        self.dot_heights += (self.target_heights - self.dot_heights) * alpha
+
+        # Only repaint the columns of dots that visibly moved
+        moved = np.abs(self.dot_heights - self._painted_heights) > REPAINT_THRESHOLD
+        if moved.any():
+            self._painted_heights[moved] = self.dot_heights[moved]
+            region = QRegion()
+            for i in np.flatnonzero(moved):
+                region += self._dot_columns[i]
+            self.update(region)
+
+    def _update_layout(self) -> None:
+        """Compute the dot positions for the current widget size."""
+        width = self.width()
+        height = self.height()
 
-        self.update()
+        spacing = (width - NUM_DOTS * DOT_RADIUS * 2) / (NUM_DOTS + 1)
+        self._x_centers = tuple(
+            spacing + i * (DOT_RADIUS * 2 + spacing) + DOT_RADIUS
+            for i in range(NUM_DOTS)
+        )
+        self._y_center = height / 2
+        self._y_travel = height * 0.3
+
+        # Area each dot can cover at its largest scale, for partial repaints
+        half = int(DOT_RADIUS * 1.2) + 2
+        self._dot_columns = [
+            QRect(int(x) - half, 0, half * 2, height) for x in self._x_centers
+        ]
+
+    def resizeEvent(self, event) -> None:
+        """Recompute the dot layout when the size changes."""
+        super().resizeEvent(event)
+        self._update_layout()
 
     def paintEvent(self, event) -> None:
         """Paint the animated dots."""
         painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-
-        width = self.width()
-        height = self.height()
-
-        dot_radius = 8
-        spacing = (width - NUM_DOTS * dot_radius * 2) / (NUM_DOTS + 1)
-
-        for i in range(NUM_DOTS):
-            x = spacing + i * (dot_radius * 2 + spacing) + dot_radius
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
 
+        source = QRectF(0, 0, SPRITE_SIZE, SPRITE_SIZE)
+        pixmaps = self._dot_pixmaps
+        for i, x in enumerate(self._x_centers):
             # Vertical position based on height
-            dot_height = self.dot_heights[i]
-            y_offset = (1 - dot_height) * (height * 0.3)
-            y = height / 2 - y_offset
+            dot_height = float(self.dot_heights[i])
+            y = self._y_center - (1 - dot_height) * self._y_travel
 
             # Scale dot size slightly with audio
-            scale = 0.8 + dot_height * 0.4
-            r = dot_radius * scale
-
-            # Create gradient for 3D effect
-            gradient = QRadialGradient(x - r * 0.3, y - r * 0.3, r * 1.5)
-            color = self.colors[i % len(self.colors)]
-            gradient.setColorAt(0, color.lighter(130))
-            gradient.setColorAt(0.5, color)
-            gradient.setColorAt(1, color.darker(120))
-
-            painter.setBrush(QBrush(gradient))
-            painter.setPen(Qt.PenStyle.NoPen)
-            painter.drawEllipse(int(x - r), int(y - r), int(r * 2), int(r * 2))
+            r = DOT_RADIUS * (0.8 + dot_height * 0.4)
+
+            # Blit the pre-rendered dot instead of rasterizing a gradient
+            painter.drawPixmap(
+                QRectF(x - r, y - r, r * 2, r * 2), pixmaps[i % len(pixmaps)], source
+            )
 
     def stop(self) -> None:
         """Stop the animation timer."""
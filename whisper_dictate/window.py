@@ -9,20 +9,34 @@ import threading
 from pathlib import Path
 from typing import Optional
 
-from PyQt6.QtCore import Qt, QTimer, pyqtSignal
+from PyQt6.QtCore import QProcess, Qt, QTimer, pyqtSignal
 from PyQt6.QtWidgets import QApplication, QLabel, QVBoxLayout, QWidget
 
 from whisper_dictate.config import Config
 from whisper_dictate.recorder import AudioRecorder
-from whisper_dictate.transcriber import Transcriber
+from whisper_dictate.transcriber import Transcriber, clean_output, get_or_create
 from whisper_dictate.utils import (
-    cleanup_pid,
     copy_to_clipboard,
     type_text,
 )
 from whisper_dictate.visualizer import DotVisualizer
 
 
+def shared_transcriber(config: Config) -> Transcriber:
+    """
+    Get the process-wide Transcriber for a configuration.
+
+    Shared so a daemon reuses the warm whisper-server between windows.
+    """
+    return get_or_create(
+        model_path=config.model.file_path,
+        whisper_cli=config.transcription.whisper_cli or None,
+        language=config.general.language,
+        threads=config.transcription.threads,
+        timeout=config.transcription.timeout,
+    )
+
+
 class RecorderWindow(QWidget):
     """
     Main recording window with animated dot visualizer.
@@ -30,7 +44,6 @@ class RecorderWindow(QWidget):
     Handles the full recording -> transcription -> output flow.
     """
 
-    audio_signal = pyqtSignal(float)
     transcription_done = pyqtSignal(str)
     stop_signal = pyqtSignal()
 
@@ -39,27 +52,13 @@ class RecorderWindow(QWidget):
         self.config = config
         self.recording = False
 
-        # Determine model path
-        model_path = Path(config.model.path) / f"ggml-{config.model.name}.bin"
-        if not config.model.name.endswith(".bin"):
-            model_path = Path(config.model.path) / f"ggml-{config.model.name}.bin"
-        else:
-            model_path = Path(config.model.path) / config.model.name
-
         # Initialize components
-        self.recorder = AudioRecorder(level_callback=self._on_audio_level)
-        self.transcriber = Transcriber(
-            model_path=model_path,
-            whisper_cli=config.transcription.whisper_cli or None,
-            language=config.general.language,
-            threads=config.transcription.threads,
-            timeout=config.transcription.timeout,
-        )
+        self.recorder = AudioRecorder()
+        self.transcriber = shared_transcriber(config)
 
         self.setup_ui()
 
         # Connect signals for thread-safe UI updates
-        self.audio_signal.connect(self.visualizer.set_audio_level)
         self.transcription_done.connect(self._on_transcription_done)
         self.stop_signal.connect(self.stop_and_transcribe)
 
@@ -82,7 +81,10 @@ class RecorderWindow(QWidget):
         layout.setSpacing(5)
 
         # Dot visualizer
-        self.visualizer = DotVisualizer(theme=self.config.ui.theme)
+        # The visualizer polls the recorder's level ring on each animation frame
+        self.visualizer = DotVisualizer(
+            theme=self.config.ui.theme, level_source=self.recorder.peek_level
+        )
         layout.addWidget(self.visualizer, alignment=Qt.AlignmentFlag.AlignCenter)
 
         # Status label
@@ -135,10 +137,6 @@ class RecorderWindow(QWidget):
         QTimer.singleShot(50, self.position_window)
         QTimer.singleShot(150, self.position_window)
 
-    def _on_audio_level(self, level: float) -> None:
-        """Callback for audio level updates (called from audio thread)."""
-        self.audio_signal.emit(level)
-
     def start_recording(self) -> None:
         """Start recording audio."""
         self.recording = True
@@ -151,31 +149,89 @@ class RecorderWindow(QWidget):
 
         self.recording = False
         self.status_label.setText("Processing...")
+        self.visualizer.set_processing()
 
         # Stop recording and get audio file
         audio_file = self.recorder.stop()
 
-        if audio_file:
-            # Run transcription in background thread
+        if not audio_file:
+            self.transcription_done.emit("")
+        elif self.transcriber.server_running:
+            # HTTP requests to whisper-server block, so use a background thread
             threading.Thread(
                 target=self._transcribe_thread, args=(audio_file,), daemon=True
             ).start()
         else:
-            self.transcription_done.emit("")
+            # whisper-cli runs as a QProcess watched by the Qt event loop
+            self._start_transcribe_process(audio_file)
+
+    def _output_text(self, text: str) -> None:
+        """Copy transcribed text to the clipboard and optionally type it."""
+        if text:
+            # Copy to clipboard
+            copy_to_clipboard(text)
+
+            # Optionally type it
+            if self.config.general.output_mode == "type":
+                type_text(text)
+
+    def _start_transcribe_process(self, audio_file: Path) -> None:
+        """Run whisper-cli without blocking the event loop."""
+        command = self.transcriber.cli_command(audio_file)
+
+        self._process = QProcess(self)
+        self._process.finished.connect(self._on_process_finished)
+        self._process.errorOccurred.connect(self._on_process_error)
+
+        self._process_timer = QTimer(self)
+        self._process_timer.setSingleShot(True)
+        self._process_timer.timeout.connect(self._on_process_timeout)
+        self._process_timer.start(self.transcriber.timeout * 1000)
+
+        self._process.start(command[0], command[1:])
+
+    def _on_process_timeout(self) -> None:
+        """Kill whisper-cli when it runs past the configured timeout."""
+        print(f"Transcription timed out after {self.transcriber.timeout}s")
+        self._process.kill()
+
+    def _on_process_error(self, error: QProcess.ProcessError) -> None:
+        """Finish with no text if whisper-cli could not be started."""
+        # Other errors are followed by finished()
+        if error == QProcess.ProcessError.FailedToStart:
+            print(f"Transcription error: {self._process.errorString()}")
+            self._finish_process("")
+
+    def _on_process_finished(
+        self, exit_code: int, exit_status: QProcess.ExitStatus
+    ) -> None:
+        """Collect whisper-cli output once it exits."""
+        text = ""
+        if exit_status == QProcess.ExitStatus.NormalExit:
+            stdout = bytes(self._process.readAllStandardOutput().data())
+            text = clean_output(stdout.decode(errors="replace"))
+        self._finish_process(text)
+
+    def _finish_process(self, text: str) -> None:
+        """Hand whisper-cli's text to the output thread."""
+        self._process_timer.stop()
+        # Typing a long transcription can take seconds, so keep it off the
+        # event loop just like the server path does
+        threading.Thread(target=self._output_thread, args=(text,), daemon=True).start()
 
     def _transcribe_thread(self, audio_file: Path) -> None:
         """Transcription thread."""
         try:
             text = self.transcriber.transcribe(audio_file)
+        except Exception as e:
+            print(f"Error during transcription: {e}")
+            text = ""
+        self._output_thread(text)
 
-            if text:
-                # Copy to clipboard
-                copy_to_clipboard(text)
-
-                # Optionally type it
-                if self.config.general.output_mode == "type":
-                    type_text(text)
-
+    def _output_thread(self, text: str) -> None:
+        """Output the text and signal completion, off the GUI thread."""
+        try:
+            self._output_text(text)
         except Exception as e:
             print(f"Error during transcription: {e}")
             text = ""
@@ -189,7 +245,6 @@ class RecorderWindow(QWidget):
     def _on_transcription_done(self, text: str) -> None:
         """Called on main thread when transcription completes."""
         self.recorder.cleanup()
-        cleanup_pid()
         # Small delay then close
         QTimer.singleShot(100, self.close)
 
@@ -204,6 +259,6 @@ class RecorderWindow(QWidget):
             self.stop_and_transcribe()
             event.ignore()
         else:
+            # The shared transcriber outlives the window, main() closes it
             self.visualizer.stop()
-            cleanup_pid()
             event.accept()